@@ -0,0 +1,147 @@
+"""
+Move generation throughput: Piece-object walk vs packed tables vs bitboards.
+
+Run from the repo root:  python -m benchmarks.movegen [positions] [seconds]
+"""
+import random
+import sys
+import time
+
+from components.board import Board
+from components.bitboard import BitBoard
+from components.player import players_colors
+from components.tables import POS
+
+def sample_positions(count, plies=60, seed=1):
+    """Boards reached by random play from the starting position."""
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        board = Board()
+        for ply in range(rng.randint(0, plies)):
+            color = players_colors[ply % len(players_colors)]
+            moves = board.generate_moves(color)
+            if moves:
+                fr, to = rng.choice(moves)
+                board.move(color, POS[fr], POS[to])
+        boards.append(board.to_bytes())
+    return boards
+
+# --- the original generator: a 14x14 grid of Piece objects, each walking
+# its directions one step at a time with bounds checks (as in the first
+# version of pieces.py, before the packed board and move tables) ---
+
+_PAWN_DIRS = {'w': (-1, 0), 'b': (1, 0), 'r': (0, -1), 'g': (0, 1)}
+_ROOK_DIRS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+_BISHOP_DIRS = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+_KNIGHT_DIRS = [(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)]
+
+class _GridBoard:
+    def __init__(self, board):
+        self.size = board.size
+        self.grid = [[_OldPiece(p.color, p.symbol) if p else None for p in row]
+                     for row in board.grid]
+
+    def in_bounds(self, pos):
+        r, c = pos
+        return 0 <= r < self.size and 0 <= c < self.size
+
+    def is_empty(self, pos):
+        r, c = pos
+        return self.grid[r][c] is None
+
+    def get_piece(self, pos):
+        r, c = pos
+        return self.grid[r][c]
+
+class _OldPiece:
+    def __init__(self, color, symbol):
+        self.color = color
+        self.symbol = symbol
+
+    def _slide(self, board, pos, dirs):
+        moves = []
+        r, c = pos
+        for dr, dc in dirs:
+            nr, nc = r+dr, c+dc
+            while board.in_bounds((nr, nc)):
+                if board.is_empty((nr, nc)):
+                    moves.append((nr, nc))
+                else:
+                    if board.get_piece((nr, nc)).color != self.color:
+                        moves.append((nr, nc))
+                    break
+                nr += dr; nc += dc
+        return moves
+
+    def _step(self, board, pos, dirs):
+        moves = []
+        r, c = pos
+        for dr, dc in dirs:
+            nr, nc = r+dr, c+dc
+            if board.in_bounds((nr, nc)):
+                target = board.get_piece((nr, nc))
+                if target is None or target.color != self.color:
+                    moves.append((nr, nc))
+        return moves
+
+    def legal_moves(self, board, pos):
+        if self.symbol == 'P':
+            moves = []
+            r, c = pos
+            dr, dc = _PAWN_DIRS[self.color]
+            nr, nc = r + dr, c + dc
+            if board.in_bounds((nr, nc)) and board.is_empty((nr, nc)):
+                moves.append((nr, nc))
+            for odir in [(-dc, dr), (dc, -dr)]:
+                cr, cc = r + dr + odir[0], c + dc + odir[1]
+                if board.in_bounds((cr, cc)):
+                    target = board.get_piece((cr, cc))
+                    if target and target.color != self.color:
+                        moves.append((cr, cc))
+            return moves
+        if self.symbol == 'R':
+            return self._slide(board, pos, _ROOK_DIRS)
+        if self.symbol == 'B':
+            return self._slide(board, pos, _BISHOP_DIRS)
+        if self.symbol == 'Q':
+            return self._slide(board, pos, _ROOK_DIRS) + self._slide(board, pos, _BISHOP_DIRS)
+        if self.symbol == 'N':
+            return self._step(board, pos, _KNIGHT_DIRS)
+        return self._step(board, pos, _ROOK_DIRS + _BISHOP_DIRS)
+
+def object_walk(board, color):
+    # ask every square of the grid for its Piece object
+    moves = []
+    for r in range(board.size):
+        for c in range(board.size):
+            piece = board.grid[r][c]
+            if piece and piece.color == color:
+                moves.extend(piece.legal_moves(board, (r, c)))
+    return moves
+
+def measure(name, boards, generate, seconds):
+    nodes = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds:
+        for board in boards:
+            for color in players_colors:
+                nodes += len(generate(board, color))
+        elapsed = time.perf_counter() - start
+    rate = nodes / elapsed
+    print(f"{name:<14} {rate:>12,.0f} nodes/sec")
+    return rate
+
+def main(positions=200, seconds=2.0):
+    data = sample_positions(int(positions))
+    seconds = float(seconds)
+    boards = [Board.from_bytes(d) for d in data]
+    bitboards = [BitBoard.from_bytes(d) for d in data]
+    base = measure("object walk", [_GridBoard(b) for b in boards], object_walk, seconds)
+    for name, bs in [("table walk", boards), ("bitboard", bitboards)]:
+        rate = measure(name, bs, lambda b, c: b.generate_moves(c), seconds)
+        print(f"{'':<14} {rate / base:>11.2f}x vs object walk")
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
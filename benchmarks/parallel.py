@@ -0,0 +1,40 @@
+"""
+Root-split search scaling: nodes/sec with 1..N worker processes.
+
+Run from the repo root:  python -m benchmarks.parallel [max_workers] [seconds]
+"""
+import os
+import sys
+import time
+
+from components.engine import Engine
+from benchmarks.movegen import sample_positions
+from components.board import Board
+
+def measure(workers, positions, seconds):
+    engine = Engine('w', time_budget=seconds, workers=workers)
+    try:
+        # warm the pool up so process start-up is not counted
+        engine.search(positions[0], time_budget=0.05)
+        nodes = 0
+        start = time.perf_counter()
+        for board in positions:
+            engine.search(board)
+            nodes += engine.nodes
+        elapsed = time.perf_counter() - start
+    finally:
+        engine.close()
+    return nodes / elapsed
+
+def main(max_workers=os.cpu_count(), seconds=2.0):
+    positions = [Board.from_bytes(d) for d in sample_positions(4, seed=7)]
+    base = None
+    workers = 1
+    while workers <= int(max_workers):
+        rate = measure(workers, positions, float(seconds))
+        base = base or rate
+        print(f"{workers:>3} workers {rate:>12,.0f} nodes/sec {rate / base:>6.2f}x")
+        workers *= 2
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,43 @@
+"""
+GUI sprite start-up time: 24 separate PNGs vs the cached atlas.
+
+Run from the repo root:  python -m benchmarks.startup
+Uses SDL's dummy video driver, so no window is opened.
+"""
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+
+from components import sprites
+from components.gui import CELL
+from components.player import players_colors
+
+def per_png(cell):
+    # what GUI._load_images used to do on every construction
+    imgs = {}
+    for color in players_colors:
+        for symbol in sprites.SYMBOLS:
+            img = pygame.image.load(f"assets/{color}{symbol}.png").convert_alpha()
+            imgs[(color, symbol)] = pygame.transform.scale(img, (cell, cell))
+    return imgs
+
+def timed(label, fn):
+    start = time.perf_counter()
+    fn()
+    print(f"{label:<32} {1000 * (time.perf_counter() - start):8.1f} ms")
+
+def main():
+    pygame.init()
+    pygame.display.set_mode((CELL * 14, CELL * 14))
+    timed("per-PNG load + scale", lambda: per_png(CELL))
+    if not os.path.exists(sprites.ATLAS_PATH):
+        timed("atlas build (first run only)", sprites.atlas)
+        sprites._atlas = None
+    timed("atlas load + cut (cold)", lambda: sprites.sprite_set(CELL))
+    timed("second GUI, same size (cached)", lambda: sprites.sprite_set(CELL))
+    timed("resize to a new cell size", lambda: sprites.sprite_set(CELL + 8))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Headless command line tools (no pygame needed).
+
+    python cli.py selfplay --games=1000 --bots=depth:2,random --workers=16
+    python cli.py selfplay --games=100000 --record=games.4pcr
+    python cli.py perft 5
+    python cli.py serve --port=5000
+    python cli.py serve --metrics_file=metrics.jsonl --metrics_every=30
+    python cli.py analyze games.4pcr --ply=40
+"""
+import fire
+
+from components import perft as _perft
+from components import selfplay as _selfplay
+from components import server as _server
+
+def selfplay(games=100, bots='random', workers=None, out='selfplay.jsonl',
+             max_plies=400, seed=0, record=None, check_rules=False):
+    """Play games between bots ('random', 'greedy', 'engine:secs', 'depth:n')."""
+    _selfplay.run(games, bots, workers, out, max_plies, seed, record, check_rules)
+
+def perft(depth=4, bitboard=False):
+    """Print perft node counts and nodes/sec from the starting position."""
+    board_cls = _perft.Board
+    if bitboard:
+        from components.bitboard import BitBoard
+        board_cls = BitBoard
+    _perft.run(depth, board_cls)
+
+def serve(port=5000, max_rooms=1000, lobby_timeout=600, archive=None, check_rules=False,
+          metrics_file=None, metrics_every=10.0):
+    """
+    Run a multi-room game server; clients join with 'host/room' or 'host/new'.
+    With metrics_file, timings and counters are appended to it every
+    metrics_every seconds.
+    """
+    _server.serve(port, max_rooms, lobby_timeout, archive, check_rules,
+                  metrics_file, metrics_every)
+
+def analyze(archive, ply=None):
+    """Batch-evaluate one position per archived game; print mean features per color."""
+    import time
+    from components import batch_eval
+    from components.player import players_colors
+    from components.record import RecordReader
+    with RecordReader(archive) as reader:
+        boards = batch_eval.from_archive(reader, ply)
+    start = time.perf_counter()
+    feats = batch_eval.features(boards)
+    scores = batch_eval.evaluate(boards)
+    elapsed = time.perf_counter() - start
+    print(f"{len(boards)} positions evaluated in {elapsed * 1000:.1f} ms")
+    for ci, color in enumerate(players_colors):
+        alive = feats['alive'][:, ci]
+        if not alive.any():
+            continue
+        means = {name: feats[name][alive, ci].mean() for name in
+                 ('material', 'pst', 'mobility', 'king_safety')}
+        print(f"  {color}: alive {alive.mean():.0%}  score {scores[alive, ci].mean():.0f}  "
+              + "  ".join(f"{k} {v:.1f}" for k, v in means.items()))
+
+if __name__ == '__main__':
+    fire.Fire({'selfplay': selfplay, 'perft': perft, 'serve': serve, 'analyze': analyze})
@@ -0,0 +1,258 @@
+"""
+Incrementally maintained attack maps, check detection and legal moves.
+
+AttackBoard keeps, for every color, how many of its pieces attack each
+square. A change on one square only touches the moved piece's own
+attacks and those of the sliders whose lines run through that square, so
+the maps stay current at a small fixed cost per _put.
+
+With the maps, a king move is legal when its target is not attacked by
+an enemy, and every other move only has to respect pins and checks,
+which are read off the eight lines through the king. No candidate move
+is ever made and unmade to test it.
+
+Run from the repo root to check both against brute force on random games:
+    python -m components.attacks verify [games] [seed]
+"""
+import random
+import sys
+
+from .board import Board, KIND_MASK
+from .pieces import Pawn, Knight, Bishop, Rook, Queen, King, COLOR_SHIFT, COLOR_INDEX
+from .player import players_colors
+from .tables import (
+    NUM_SQUARES, PLAYABLE, KING_DIRS, PAWN_CAPTURES, KNIGHT_TARGETS, KING_TARGETS,
+    _ray,
+)
+
+# RAYS[sq][d]: squares from sq along KING_DIRS[d] (rook lines 0-3, bishop lines 4-7)
+RAYS = tuple(tuple(_ray(sq, dr, dc) if PLAYABLE[sq] else () for dr, dc in KING_DIRS)
+             for sq in range(NUM_SQUARES))
+OPPOSITE = tuple(KING_DIRS.index((-dr, -dc)) for dr, dc in KING_DIRS)
+ROOK_LINES, BISHOP_LINES = range(4), range(4, 8)
+ALL_LINES = range(8)
+# line directions each slider kind attacks along
+LINES = {Rook.kind: ROOK_LINES, Bishop.kind: BISHOP_LINES, Queen.kind: ALL_LINES}
+# kinds that attack along line d
+SLIDES_ON = tuple({Rook.kind, Queen.kind} if d < 4 else {Bishop.kind, Queen.kind}
+                  for d in ALL_LINES)
+
+_COLORS = {i: color for color, i in COLOR_INDEX.items()}
+# PAWN_ATTACKS[ci][sq]: squares a pawn of color index ci on sq attacks
+PAWN_ATTACKS = [PAWN_CAPTURES[_COLORS[ci]] for ci in range(len(COLOR_INDEX))]
+# PAWN_ATTACKERS[ci][sq]: squares from which a pawn of ci attacks sq
+PAWN_ATTACKERS = []
+for _ci in range(len(COLOR_INDEX)):
+    _table = [[] for _ in range(NUM_SQUARES)]
+    for _sq in range(NUM_SQUARES):
+        for _t in PAWN_ATTACKS[_ci][_sq]:
+            _table[_t].append(_sq)
+    PAWN_ATTACKERS.append(tuple(map(tuple, _table)))
+
+class AttackBoard(Board):
+    def __init__(self, size=14, setup=True):
+        self.attack_counts = [bytearray(NUM_SQUARES) for _ in COLOR_INDEX]
+        super().__init__(size, setup)
+
+    # --- maintenance ---
+
+    def _line(self, sq, d):
+        """Squares a slider on sq attacks along line d (up to the first piece)."""
+        cells = self.cells
+        for i, t in enumerate(RAYS[sq][d]):
+            if cells[t]:
+                return RAYS[sq][d][:i + 1]
+        return RAYS[sq][d]
+
+    def _attacked_from(self, sq, code):
+        """Squares the piece code on sq attacks, given the current occupancy."""
+        kind = code & KIND_MASK
+        if kind == Pawn.kind:
+            return PAWN_ATTACKS[code >> COLOR_SHIFT][sq]
+        if kind == Knight.kind:
+            return KNIGHT_TARGETS[sq]
+        if kind == King.kind:
+            return KING_TARGETS[sq]
+        squares = []
+        for d in LINES[kind]:
+            squares.extend(self._line(sq, d))
+        return squares
+
+    def _add_attacks(self, sq, code, step):
+        counts = self.attack_counts[code >> COLOR_SHIFT]
+        for t in self._attacked_from(sq, code):
+            counts[t] += step
+
+    def _put(self, sq, code):
+        old = self.cells[sq]
+        if old:
+            self._add_attacks(sq, old, -1)
+        if bool(old) != bool(code):
+            # sliders looking at sq now see further (sq emptied) or less far
+            step = 1 if old else -1
+            cells = self.cells
+            for d in ALL_LINES:
+                for s in RAYS[sq][d]:
+                    slider = cells[s]
+                    if slider:
+                        if slider & KIND_MASK in SLIDES_ON[d]:
+                            counts = self.attack_counts[slider >> COLOR_SHIFT]
+                            for t in self._line(sq, OPPOSITE[d]):
+                                counts[t] += step
+                        break
+        super()._put(sq, code)
+        if code:
+            self._add_attacks(sq, code, 1)
+
+    def _copy_state(self, other):
+        super()._copy_state(other)
+        self.attack_counts = [bytearray(c) for c in other.attack_counts]
+
+    def _rebuild(self):
+        super()._rebuild()
+        self.attack_counts = [bytearray(NUM_SQUARES) for _ in COLOR_INDEX]
+        for sq, code in enumerate(self.cells):
+            if code:
+                self._add_attacks(sq, code, 1)
+
+    # --- queries ---
+
+    def attacked(self, sq, enemies):
+        """True if any color index in enemies attacks sq."""
+        counts = self.attack_counts
+        return any(counts[e][sq] for e in enemies)
+
+    def in_check(self, color, enemies):
+        k = self.king_squares[COLOR_INDEX[color]]
+        return k is not None and self.attacked(k, enemies)
+
+    def check_state(self, ci, enemies):
+        """
+        Look along the lines through ci's king. Returns (checkers, evasions,
+        xray, pins): checker squares; squares a non-king move must land on
+        to answer a single check; squares behind the king on a checking
+        line; and {pinned square: squares it may still move to}.
+        """
+        k = self.king_squares[ci]
+        cells = self.cells
+        checkers, evasions, xray, pins = [], set(), set(), {}
+        for d in ALL_LINES:
+            ray = RAYS[k][d]
+            own = None
+            for i, s in enumerate(ray):
+                code = cells[s]
+                if not code:
+                    continue
+                if code >> COLOR_SHIFT not in enemies or code & KIND_MASK not in SLIDES_ON[d]:
+                    if own is not None or code >> COLOR_SHIFT != ci:
+                        break
+                    own = s     # our piece: pinned if an enemy slider is behind it
+                    continue
+                if own is None:
+                    checkers.append(s)
+                    evasions.update(ray[:i + 1])
+                    xray.update(RAYS[k][OPPOSITE[d]][:1])
+                else:
+                    pins[own] = set(ray[:i + 1])
+                break
+        if self.attacked(k, enemies):
+            # the rest only matter for check: knights, pawns, kings
+            for e in enemies:
+                for s in KNIGHT_TARGETS[k]:
+                    if cells[s] == (e << COLOR_SHIFT) | Knight.kind:
+                        checkers.append(s)
+                        evasions.add(s)
+                for s in PAWN_ATTACKERS[e][k]:
+                    if cells[s] == (e << COLOR_SHIFT) | Pawn.kind:
+                        checkers.append(s)
+                        evasions.add(s)
+                for s in KING_TARGETS[k]:
+                    if cells[s] == (e << COLOR_SHIFT) | King.kind:
+                        checkers.append(s)
+                        evasions.add(s)
+        return checkers, evasions, xray, pins
+
+    def _legal_filter(self, ci, enemies):
+        """Predicate (fr, to) -> bool for ci's pseudo-legal moves."""
+        k = self.king_squares[ci]
+        if k is None:
+            return lambda fr, to: True
+        checkers, evasions, xray, pins = self.check_state(ci, enemies)
+        counts = [self.attack_counts[e] for e in enemies]
+        double = len(checkers) > 1
+
+        def legal(fr, to):
+            if fr == k:
+                return to not in xray and not any(c[to] for c in counts)
+            if double:
+                return False
+            if fr in pins and to not in pins[fr]:
+                return False
+            return not checkers or to in evasions
+        return legal
+
+    def legal_targets(self, sq, enemies):
+        """Destination squares of the piece on sq that keep its king safe."""
+        code = self.cells[sq]
+        if not code:
+            return []
+        legal = self._legal_filter(code >> COLOR_SHIFT, enemies)
+        return [t for t in self.targets(sq) if legal(sq, t)]
+
+    def generate_legal_moves(self, color, enemies):
+        """(from_sq, to_sq) moves of color that do not leave its king attacked."""
+        legal = self._legal_filter(COLOR_INDEX[color], enemies)
+        return [m for m in self.generate_moves(color) if legal(*m)]
+
+# --- verification ---
+
+def _left_in_check(board, move, ci, enemies):
+    """Make move and look for an enemy move onto ci's king, without the maps."""
+    token = board.make_move(move)
+    k = board.king_squares[ci]
+    hit = any(to == k for e in enemies for _, to in board.generate_moves(players_colors[e]))
+    board.unmake_move(token)
+    return hit
+
+def verify(games=150, seed=0, max_plies=300):
+    """
+    Play seeded random games under check rules. At every position compare
+    the attack maps with a rebuild from the cells, and the legal moves with
+    make / look for a king capture / unmake. Returns True if all match.
+    """
+    from .game import Game
+    from .tables import POS
+    rng = random.Random(seed)
+    positions = checks = bad = 0
+    for g in range(games):
+        # the default board under check rules is an AttackBoard
+        game = Game(check_rules=True, history=False, record=False)
+        board = game.board
+        for ply in range(max_plies):
+            if sum(game.is_alive(c) for c in players_colors) < 2:
+                break
+            color = game.current_player().color
+            ci, enemies = COLOR_INDEX[color], game.enemies(color)
+            positions += 1
+            checks += board.in_check(color, enemies)
+            if board.attack_counts != type(board).from_bytes(board.cells).attack_counts:
+                bad += 1
+                print(f"game {g} ply {ply}: attack maps differ from a rebuild")
+            legal = board.generate_legal_moves(color, enemies)
+            brute = [m for m in board.generate_moves(color)
+                     if not _left_in_check(board, m, ci, enemies)]
+            if sorted(legal) != sorted(brute):
+                bad += 1
+                print(f"game {g} ply {ply}: {color} legal moves {sorted(set(legal) ^ set(brute))} disagree")
+            if not legal:
+                break
+            fr, to = rng.choice(legal)
+            game.selected = POS[fr]
+            game.move(POS[to])
+    print(f"{games} games, {positions} positions ({checks} in check): {bad} mismatches")
+    return bad == 0
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if args and args[0] == 'verify':
+        sys.exit(0 if verify(*map(int, args[1:3])) else 1)
@@ -0,0 +1,209 @@
+"""
+Vectorised evaluation of many positions at once with NumPy.
+
+Boards go in as an (N, 14, 14) int8 array of packed cells, the same
+(color index << 3) | kind bytes Board keeps, so stacking Board.cells is
+a single copy. Every feature comes back as an (N, 4) array, one column
+per color in players_colors order, in centipawns like Engine.evaluate:
+
+    material      piece values (king 0)
+    pst           piece-square bonuses (pawn advance, centralisation,
+                  king kept home)
+    mobility      empty squares one step away along each piece's lines
+                  (knight jumps for knights); blockers further out are
+                  ignored, which keeps it to sixteen whole-batch shifts
+    king_safety   own pieces around the king minus enemy material within
+                  two squares of it
+
+No Python loop runs per board or per piece: the pieces of the whole batch
+are pulled out into flat arrays once and summed per (board, color) with
+bincount.
+"""
+import numpy as np
+
+from .board import encode, _VALUES, KIND_MASK
+from .engine import MATE, _CENTER
+from .pieces import Pawn, Knight, Bishop, Rook, Queen, King, COLOR_SHIFT, COLOR_INDEX
+from .tables import SIZE, NUM_SQUARES, PLAYABLE, POS, ROOK_DIRS, BISHOP_DIRS, KNIGHT_DIRS
+
+NCOLORS = len(COLOR_INDEX)
+NCODES = 1 << (COLOR_SHIFT + 2)
+
+MOBILITY_WEIGHT = 4
+SHIELD_WEIGHT = 15
+PRESSURE_WEIGHT = 10
+PAWN_ADVANCE = 8
+
+def _code_table(fn, dtype=np.int32):
+    """Array indexed by packed cell code; fn(ci, kind) gives the entry."""
+    table = np.zeros(NCODES, dtype)
+    for ci in range(NCOLORS):
+        for kind in (Pawn.kind, Knight.kind, Bishop.kind, Rook.kind, Queen.kind, King.kind):
+            table[(ci << COLOR_SHIFT) | kind] = fn(ci, kind)
+    return table
+
+VALUES = np.array(_VALUES[:NCODES], np.int32) * 100
+ORTH   = _code_table(lambda ci, k: k in (Rook.kind, Queen.kind, King.kind), np.uint8)
+DIAG   = _code_table(lambda ci, k: k in (Bishop.kind, Queen.kind, King.kind), np.uint8)
+JUMP   = _code_table(lambda ci, k: k == Knight.kind, np.uint8)
+
+# distance of (r, c) from each color's home edge
+_FROM_HOME = {
+    COLOR_INDEX['w']: lambda r, c: SIZE - 1 - r,
+    COLOR_INDEX['b']: lambda r, c: r,
+    COLOR_INDEX['r']: lambda r, c: SIZE - 1 - c,
+    COLOR_INDEX['g']: lambda r, c: c,
+}
+
+def _pst(code, sq):
+    if not code:
+        return 0
+    ci, kind = code >> COLOR_SHIFT, code & KIND_MASK
+    r, c = POS[sq]
+    if kind == Pawn.kind:
+        return PAWN_ADVANCE * max(0, _FROM_HOME[ci](r, c) - 1)
+    if kind in (Knight.kind, Bishop.kind):
+        return _CENTER[sq]
+    if kind in (Rook.kind, Queen.kind):
+        return _CENTER[sq] // 2
+    return -_CENTER[sq]
+
+# PST[code, sq]
+PST = np.array([[_pst(code, sq) for sq in range(NUM_SQUARES)] for code in range(NCODES)],
+               np.int32)
+
+def _around(sq, radius):
+    r0, c0 = POS[sq]
+    return [r * SIZE + c
+            for r in range(r0 - radius, r0 + radius + 1)
+            for c in range(c0 - radius, c0 + radius + 1)
+            if (r, c) != (r0, c0) and 0 <= r < SIZE and 0 <= c < SIZE and PLAYABLE[r * SIZE + c]]
+
+def _king_zone(sq):
+    """Squares around sq: the 8-square ring first (padded to 8), then the rest."""
+    ring = _around(sq, 1)
+    rest = [t for t in _around(sq, 2) if t not in ring]
+    return ring + [0] * (8 - len(ring)) + rest + [0] * (16 - len(rest))
+
+# [sq] -> king ring then zone; padding is square 0, a corner that is never occupied
+KING_ZONE = np.array([_king_zone(sq) for sq in range(NUM_SQUARES)], np.intp)
+# indexed by (king color << COLOR_SHIFT + 2) | code
+OWN_PIECE   = np.array([code and code >> COLOR_SHIFT == kc
+                        for kc in range(NCOLORS) for code in range(NCODES)], np.int32)
+ENEMY_VALUE = np.array([0 if not code or code >> COLOR_SHIFT == kc else _VALUES[code]
+                        for kc in range(NCOLORS) for code in range(NCODES)], np.int32)
+
+# material plus piece-square bonus, indexed by code * NUM_SQUARES + sq
+STATIC = (VALUES[:, None] + PST).ravel()
+PST_FLAT = PST.ravel()
+
+PLAYABLE_GRID = np.array(PLAYABLE).reshape(SIZE, SIZE)
+
+# mobility works on boards with a 2-square empty border laid end to end, so
+# a step in any direction is one fixed offset into a flat array
+PAD = SIZE + 4
+PAD_AREA = PAD * PAD
+MARGIN = 2 * PAD + 2
+
+def from_board(board):
+    return np.frombuffer(board.cells, np.int8).reshape(SIZE, SIZE)
+
+def from_grid(grid):
+    """(14, 14) array from a Board.grid style list of Piece rows."""
+    return np.array([[encode(p) for p in row] for row in grid], np.int8)
+
+def stack(boards):
+    """(N, 14, 14) array from Board objects, in one copy."""
+    data = b"".join(b.cells for b in boards)
+    return np.frombuffer(data, np.int8).reshape(-1, SIZE, SIZE)
+
+def _pad(empty):
+    """Flat copy of (N, 14, 14) empty flags, each board inside a 2-square border."""
+    n = empty.shape[0]
+    flat = np.zeros(n * PAD_AREA + 2 * MARGIN, np.uint8)
+    flat[MARGIN:MARGIN + n * PAD_AREA].reshape(n, PAD, PAD)[:, 2:-2, 2:-2] = empty
+    return flat
+
+def _empty_steps(flat, dirs):
+    """For every padded square, how many of dirs lead to an empty square."""
+    size = len(flat) - 2 * MARGIN
+    count = np.zeros(size, np.uint8)
+    for dr, dc in dirs:
+        start = MARGIN + dr * PAD + dc
+        count += flat[start:start + size]
+    return count
+
+class _Pieces:
+    """Every piece of a batch as flat arrays: one entry per occupied square."""
+
+    def __init__(self, boards):
+        boards = np.asarray(boards, np.int8).reshape(-1, SIZE, SIZE)
+        self.boards = boards
+        self.n = boards.shape[0]
+        self.codes = boards.reshape(-1).view(np.uint8)
+        self.at = np.flatnonzero(self.codes != 0)
+        self.board = self.at // NUM_SQUARES
+        self.sq = self.at - self.board * NUM_SQUARES
+        self.code = np.take(self.codes, self.at)
+        self.slot = self.board * NCOLORS + (self.code >> COLOR_SHIFT)
+        self.table_index = self.code.astype(np.intp) * NUM_SQUARES + self.sq
+
+    def per_color(self, values):
+        """Sum one value per piece into (N, 4) by board and color."""
+        sums = np.bincount(self.slot, weights=values, minlength=self.n * NCOLORS)
+        return sums.reshape(self.n, NCOLORS).astype(np.int32)
+
+    def mobility(self):
+        """Empty squares next to each piece along its own lines."""
+        n = self.n
+        flat = _pad((self.boards == 0) & PLAYABLE_GRID)
+        steps = np.zeros(len(self.at), np.uint8)
+        for dirs, uses in ((ROOK_DIRS, ORTH), (BISHOP_DIRS, DIAG), (KNIGHT_DIRS, JUMP)):
+            count = _empty_steps(flat, dirs).reshape(n, PAD, PAD)[:, 2:-2, 2:-2].reshape(-1)
+            steps += np.take(count, self.at) * np.take(uses, self.code)
+        return steps
+
+    def king_safety(self):
+        """(N * 4) king safety scores, (N * 4) alive flags."""
+        kings = np.flatnonzero(self.code & KIND_MASK == King.kind)
+        slot = self.slot[kings]
+        zone = np.take(self.codes, self.board[kings, None] * NUM_SQUARES
+                       + KING_ZONE[self.sq[kings]])
+        key = zone + (self.code[kings, None] >> COLOR_SHIFT << COLOR_SHIFT + 2)
+        shield = np.take(OWN_PIECE, key[:, :8]).sum(axis=1)
+        pressure = np.take(ENEMY_VALUE, key).sum(axis=1)
+        safety = np.zeros(self.n * NCOLORS, np.int32)
+        safety[slot] = SHIELD_WEIGHT * shield - PRESSURE_WEIGHT * pressure
+        alive = np.zeros(self.n * NCOLORS, bool)
+        alive[slot] = True
+        return safety, alive
+
+def features(boards):
+    """Dict of (N, 4) feature arrays (see module docstring) plus 'alive'."""
+    pieces = _Pieces(boards)
+    king_safety, alive = pieces.king_safety()
+    shape = (pieces.n, NCOLORS)
+    return {
+        'material': pieces.per_color(np.take(VALUES, pieces.code)),
+        'pst': pieces.per_color(np.take(PST_FLAT, pieces.table_index)),
+        'mobility': pieces.per_color(pieces.mobility()),
+        'king_safety': king_safety.reshape(shape),
+        'alive': alive.reshape(shape),
+    }
+
+def evaluate(boards):
+    """
+    (N, 4) int32 scores: each color's own total, or -MATE once its king
+    is gone. Compare columns to rank the players in each position. Same
+    sum as the features, taken in one pass.
+    """
+    pieces = _Pieces(boards)
+    king_safety, alive = pieces.king_safety()
+    per_piece = np.take(STATIC, pieces.table_index) + MOBILITY_WEIGHT * pieces.mobility()
+    score = pieces.per_color(per_piece).ravel() + king_safety
+    return np.where(alive, score, -MATE).astype(np.int32).reshape(pieces.n, NCOLORS)
+
+def from_archive(reader, ply=None):
+    """Stack one position per game of a RecordReader (default: final)."""
+    return stack(view.position(ply if ply is None else min(ply, view.plies)).board
+                 for view in reader)
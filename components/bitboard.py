@@ -0,0 +1,178 @@
+"""
+Bitboard move generation on arbitrary-precision ints.
+
+Each of the 196 squares is one bit (bit sq = r * SIZE + c). BitBoard keeps
+one occupancy int per color and per piece kind next to the packed cells of
+Board, so it is a drop-in replacement: Game(board_cls=BitBoard).
+On CPython the big-int work costs more than it saves: it runs about 15%
+behind the table walk of Board.generate_moves (see benchmarks/movegen.py).
+"""
+from .board import Board, KIND_MASK
+from .pieces import Pawn, Knight, Bishop, Rook, King, COLOR_SHIFT, COLOR_INDEX
+from .tables import (
+    SIZE, NUM_SQUARES, PLAYABLE, PAWN_DIRS,
+    ROOK_DIRS, BISHOP_DIRS, KNIGHT_DIRS, KING_DIRS,
+)
+
+PLAYABLE_MASK = sum(1 << sq for sq in range(NUM_SQUARES) if PLAYABLE[sq])
+
+def _file_mask(cols):
+    return sum(1 << (r * SIZE + c) for r in range(SIZE) for c in cols)
+
+# squares that may move dc files sideways without wrapping to the next row
+_KEEP_FILES = {dc: _file_mask([c for c in range(SIZE) if 0 <= c + dc < SIZE])
+               for dc in range(-2, 3)}
+
+def shift(bb, dr, dc):
+    """Move every bit of bb by (dr, dc), dropping bits that leave the board."""
+    bb &= _KEEP_FILES[dc]
+    delta = dr * SIZE + dc
+    bb = bb << delta if delta > 0 else bb >> -delta
+    return bb & PLAYABLE_MASK
+
+def _step_masks(dirs):
+    masks = []
+    for sq in range(NUM_SQUARES):
+        bit = (1 << sq) if PLAYABLE[sq] else 0
+        m = 0
+        for dr, dc in dirs:
+            m |= shift(bit, dr, dc)
+        masks.append(m)
+    return masks
+
+def _ray_masks(dr, dc):
+    masks = []
+    for sq in range(NUM_SQUARES):
+        m = 0
+        bit = shift((1 << sq) if PLAYABLE[sq] else 0, dr, dc)
+        while bit:
+            m |= bit
+            bit = shift(bit, dr, dc)
+        masks.append(m)
+    return masks
+
+KNIGHT_MASKS = _step_masks(KNIGHT_DIRS)
+KING_MASKS = _step_masks(KING_DIRS)
+
+# (positive, masks): positive rays walk towards higher bit indices, so the
+# nearest blocker is the lowest set bit; negative rays use the highest one
+ROOK_RAYS = [(dr * SIZE + dc > 0, _ray_masks(dr, dc)) for dr, dc in ROOK_DIRS]
+BISHOP_RAYS = [(dr * SIZE + dc > 0, _ray_masks(dr, dc)) for dr, dc in BISHOP_DIRS]
+QUEEN_RAYS = ROOK_RAYS + BISHOP_RAYS
+
+PAWN_PUSH_MASKS = {}
+PAWN_CAPTURE_MASKS = {}
+for _color, (_dr, _dc) in PAWN_DIRS.items():
+    PAWN_PUSH_MASKS[_color] = _step_masks([(_dr, _dc)])
+    PAWN_CAPTURE_MASKS[_color] = _step_masks([(_dr - _dc, _dc + _dr), (_dr + _dc, _dc - _dr)])
+
+def slide(rays, sq, occupied):
+    attacks = 0
+    for positive, masks in rays:
+        ray = masks[sq]
+        blockers = ray & occupied
+        if blockers:
+            if positive:
+                first = (blockers & -blockers).bit_length() - 1
+            else:
+                first = blockers.bit_length() - 1
+            ray ^= masks[first]
+        attacks |= ray
+    return attacks
+
+def squares(bb):
+    """Return the set bit indices of bb, lowest first."""
+    out = []
+    while bb:
+        low = bb & -bb
+        out.append(low.bit_length() - 1)
+        bb ^= low
+    return out
+
+_COLORS = {i: color for color, i in COLOR_INDEX.items()}
+
+class BitBoard(Board):
+    def __init__(self, size=14, setup=True):
+        self.occ = [0] * len(COLOR_INDEX)       # per color
+        self.kinds = [0] * (KIND_MASK + 1)      # per piece kind
+        self.occupied = 0
+        super().__init__(size, setup)
+
+    def _put(self, sq, code):
+        bit = 1 << sq
+        old = self.cells[sq]
+        if old:
+            self.occ[old >> COLOR_SHIFT] ^= bit
+            self.kinds[old & KIND_MASK] ^= bit
+            self.occupied ^= bit
+        if code:
+            self.occ[code >> COLOR_SHIFT] |= bit
+            self.kinds[code & KIND_MASK] |= bit
+            self.occupied |= bit
+        super()._put(sq, code)
+
+    def _copy_state(self, other):
+        super()._copy_state(other)
+        self.occ = list(other.occ)
+        self.kinds = list(other.kinds)
+        self.occupied = other.occupied
+
+    def _rebuild(self):
+        super()._rebuild()
+        self.occ = [0] * len(COLOR_INDEX)
+        self.kinds = [0] * (KIND_MASK + 1)
+        self.occupied = 0
+        for sq, code in enumerate(self.cells):
+            if code:
+                bit = 1 << sq
+                self.occ[code >> COLOR_SHIFT] |= bit
+                self.kinds[code & KIND_MASK] |= bit
+                self.occupied |= bit
+
+    def attacks(self, sq):
+        """Return the destination bitboard for the piece on square sq."""
+        code = self.cells[sq]
+        if not code:
+            return 0
+        ci, kind = code >> COLOR_SHIFT, code & KIND_MASK
+        own = self.occ[ci]
+        if kind == Pawn.kind:
+            color = _COLORS[ci]
+            pushes = PAWN_PUSH_MASKS[color][sq] & ~self.occupied
+            return pushes | (PAWN_CAPTURE_MASKS[color][sq] & self.occupied & ~own)
+        if kind == Knight.kind:
+            bb = KNIGHT_MASKS[sq]
+        elif kind == King.kind:
+            bb = KING_MASKS[sq]
+        elif kind == Rook.kind:
+            bb = slide(ROOK_RAYS, sq, self.occupied)
+        elif kind == Bishop.kind:
+            bb = slide(BISHOP_RAYS, sq, self.occupied)
+        else:
+            bb = slide(QUEEN_RAYS, sq, self.occupied)
+        return bb & ~own
+
+    def targets(self, sq):
+        return squares(self.attacks(sq))
+
+    def generate_moves(self, color):
+        ci = COLOR_INDEX[color]
+        own = self.occ[ci]
+        empty = ~self.occupied
+        enemy = self.occupied & ~own
+        moves = []
+
+        # pawns set-wise: shift the whole pawn set, then map targets back
+        pawns = own & self.kinds[Pawn.kind]
+        dr, dc = PAWN_DIRS[color]
+        delta = dr * SIZE + dc
+        for t in squares(shift(pawns, dr, dc) & empty):
+            moves.append((t - delta, t))
+        for cr, cc in [(dr - dc, dc + dr), (dr + dc, dc - dr)]:
+            d = cr * SIZE + cc
+            for t in squares(shift(pawns, cr, cc) & enemy):
+                moves.append((t - d, t))
+
+        for sq in squares(own & ~self.kinds[Pawn.kind]):
+            moves.extend((sq, t) for t in squares(self.attacks(sq)))
+        return moves
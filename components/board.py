@@ -1,11 +1,87 @@
-from .pieces import Pawn, Rook, Knight, Bishop, Queen, King
-from .player import players_colors
+from .pieces import Pawn, Rook, Knight, Bishop, Queen, King, COLOR_SHIFT, COLOR_INDEX
+from .tables import POS
+from .zobrist import PIECE_KEYS, SIDE_KEYS, board_key
+
+# Packed cell encoding: 0 is empty, otherwise (color index << 3) | piece kind.
+EMPTY = 0
+KIND_MASK = 0b111
+PIECE_CLASSES = {cls.kind: cls for cls in [Pawn, Knight, Bishop, Rook, Queen, King]}
+
+def encode(piece):
+    """Return the packed byte for a Piece (or None)."""
+    if piece is None:
+        return EMPTY
+    return piece.code
+
+# one shared, immutable Piece instance per code so views never allocate
+_PIECES = [None] * 256
+for _color, _ci in COLOR_INDEX.items():
+    for _kind, _cls in PIECE_CLASSES.items():
+        _PIECES[(_ci << COLOR_SHIFT) | _kind] = _cls(_color)
+
+def decode(code):
+    """Return the shared Piece instance for a packed byte (or None)."""
+    return _PIECES[code]
+
+_VALUES = [piece.value if piece else 0 for piece in _PIECES]
 
 class Board:
-    def __init__(self, size=14):
+    def __init__(self, size=14, setup=True):
         self.size = size
-        self.grid = [[None] * size for _ in range(size)]
-        self._init_pieces()
+        # flat row-major buffer, one byte per square
+        self.cells = bytearray(size * size)
+        # per-color indexes kept in step with cells by _put
+        self.piece_squares = [set() for _ in COLOR_INDEX]
+        self.king_squares = [None] * len(COLOR_INDEX)
+        self.material = [0] * len(COLOR_INDEX)
+        self.key = 0    # Zobrist key of the piece placement
+        if setup:
+            self._init_pieces()
+
+    @classmethod
+    def from_bytes(cls, data, size=14):
+        """Build a board from a packed buffer (see to_bytes)."""
+        board = cls(size, setup=False)
+        board.cells[:] = data
+        board._rebuild()
+        return board
+
+    @classmethod
+    def from_pieces(cls, pieces, size=14):
+        """Build a board from {(r,c): 'wK', ...} (color letter + symbol)."""
+        symbols = {c.symbol: c for c in PIECE_CLASSES.values()}
+        board = cls(size, setup=False)
+        for pos, name in pieces.items():
+            board.set_piece(pos, symbols[name[1]](name[0]))
+        return board
+
+    def to_bytes(self):
+        return bytes(self.cells)
+
+    def copy(self):
+        """Return an independent board; indexes are cloned, not recomputed."""
+        board = type(self)(self.size, setup=False)
+        board.cells[:] = self.cells
+        board._copy_state(self)
+        return board
+
+    def _copy_state(self, other):
+        """Take over other's derived state; subclasses extend this with their own."""
+        self.piece_squares = [set(s) for s in other.piece_squares]
+        self.king_squares = list(other.king_squares)
+        self.material = list(other.material)
+        self.key = other.key
+
+    def __reduce__(self):
+        # pickle as the packed buffer; indexes are rebuilt on load
+        return (type(self).from_bytes, (self.to_bytes(), self.size))
+
+    @property
+    def grid(self):
+        """Row-major list-of-lists view of Piece objects (read-only snapshot)."""
+        n = self.size
+        cells = self.cells
+        return [[_PIECES[code] for code in cells[r*n:(r+1)*n]] for r in range(n)]
 
     def in_bounds(self, pos):
         r, c = pos
@@ -13,15 +89,84 @@ class Board:
 
     def is_empty(self, pos):
         r, c = pos
-        return self.grid[r][c] is None
+        return not self.cells[r*self.size + c]
 
     def get_piece(self, pos):
         r, c = pos
-        return self.grid[r][c]
+        return _PIECES[self.cells[r*self.size + c]]
 
     def set_piece(self, pos, piece):
         r, c = pos
-        self.grid[r][c] = piece
+        self._put(r*self.size + c, encode(piece))
+
+    def _put(self, sq, code):
+        """Write one packed cell; subclasses hook here to keep derived state."""
+        old = self.cells[sq]
+        if old:
+            ci = old >> COLOR_SHIFT
+            self.piece_squares[ci].discard(sq)
+            self.material[ci] -= _VALUES[old]
+            if old & KIND_MASK == King.kind and self.king_squares[ci] == sq:
+                self.king_squares[ci] = None
+        if code:
+            ci = code >> COLOR_SHIFT
+            self.piece_squares[ci].add(sq)
+            self.material[ci] += _VALUES[code]
+            if code & KIND_MASK == King.kind:
+                self.king_squares[ci] = sq
+        self.key ^= PIECE_KEYS[old][sq] ^ PIECE_KEYS[code][sq]
+        self.cells[sq] = code
+
+    def _rebuild(self):
+        """Recompute derived state after the buffer was replaced wholesale."""
+        self.piece_squares = [set() for _ in COLOR_INDEX]
+        self.king_squares = [None] * len(COLOR_INDEX)
+        self.material = [0] * len(COLOR_INDEX)
+        self.key = board_key(self.cells)
+        for sq, code in enumerate(self.cells):
+            if code:
+                ci = code >> COLOR_SHIFT
+                self.piece_squares[ci].add(sq)
+                self.material[ci] += _VALUES[code]
+                if code & KIND_MASK == King.kind:
+                    self.king_squares[ci] = sq
+
+    def position_key(self, color):
+        """Zobrist key of this placement with color to move."""
+        return self.key ^ SIDE_KEYS[color]
+
+    def has_king(self, color):
+        return self.king_squares[COLOR_INDEX[color]] is not None
+
+    def king_pos(self, color):
+        """Return the (r,c) of color's king, or None once it was captured."""
+        sq = self.king_squares[COLOR_INDEX[color]]
+        return None if sq is None else POS[sq]
+
+    def pieces_of(self, color):
+        """Return [(pos, piece)] for every piece of color."""
+        cells = self.cells
+        return [(POS[sq], _PIECES[cells[sq]]) for sq in self.piece_squares[COLOR_INDEX[color]]]
+
+    def material_of(self, color):
+        return self.material[COLOR_INDEX[color]]
+
+    def targets(self, sq):
+        """Return destination square indices for the piece on square sq."""
+        piece = _PIECES[self.cells[sq]]
+        return piece.targets(self, sq) if piece else []
+
+    def legal_moves(self, pos):
+        """Return list of (r,c) legal destinations for the piece at pos."""
+        return [POS[t] for t in self.targets(pos[0]*self.size + pos[1])]
+
+    def generate_moves(self, color):
+        """Return (from_sq, to_sq) pairs for every piece of color."""
+        cells = self.cells
+        moves = []
+        for sq in self.piece_squares[COLOR_INDEX[color]]:
+            moves.extend((sq, t) for t in _PIECES[cells[sq]].targets(self, sq))
+        return moves
 
     def _init_pieces(self):
         back_order = [Rook, Knight, Bishop, Queen, King, Bishop, Knight, Rook]
@@ -46,9 +191,26 @@ class Board:
         piece = self.get_piece(from_pos)
         if not piece or piece.color != color:
             return False
-        if to_pos not in piece.legal_moves(self, from_pos):
+        if to_pos not in self.legal_moves(from_pos):
             return False
-        # perform move / capture
-        self.set_piece(to_pos, piece)
-        self.set_piece(from_pos, None)
-        return True
+        # perform move / capture; the undo token is truthy
+        n = self.size
+        return self.make_move((from_pos[0]*n + from_pos[1], to_pos[0]*n + to_pos[1]))
+
+    def make_move(self, move):
+        """
+        Play a (from_sq, to_sq) move without legality checks.
+        Returns an undo token for unmake_move.
+        """
+        fr, to = move
+        moved = self.cells[fr]
+        captured = self.cells[to]
+        self._put(to, moved)
+        self._put(fr, EMPTY)
+        return (fr, to, moved, captured)
+
+    def unmake_move(self, token):
+        """Take back the move that produced token (last made, first undone)."""
+        fr, to, moved, captured = token
+        self._put(fr, moved)
+        self._put(to, captured)
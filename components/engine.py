@@ -0,0 +1,346 @@
+"""
+Computer opponents: a paranoid alpha-beta search for four players.
+
+The engine's color maximises its own score while every other live color
+is assumed to minimise it, which keeps plain alpha-beta pruning valid.
+Search runs on a private Board copy via make_move/unmake_move, with
+iterative deepening under a hard time budget.
+"""
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from queue import SimpleQueue
+
+from .attacks import AttackBoard
+from .board import Board, KIND_MASK, _VALUES
+from .pieces import King, COLOR_INDEX
+from .player import players_colors
+from .tables import POS, SIZE
+from .zobrist import SIDE_KEYS, TranspositionTable, EXACT, LOWER, UPPER
+
+MATE = 100000
+MAX_PLY = 64
+KING_CAPTURE = 1000  # ordering bonus: taking a king eliminates a player
+
+# small bonus for standing near the centre (12 in the middle, 0 at the rim)
+_CENTER = [
+    12 - int(abs(r - (SIZE - 1) / 2) + abs(c - (SIZE - 1) / 2))
+    for r, c in POS
+]
+
+_SIDE = [SIDE_KEYS[color] for color in players_colors]
+
+class SearchTimeout(Exception):
+    pass
+
+class Engine:
+    """Time-budgeted paranoid search for one color."""
+
+    def __init__(self, color, time_budget=1.0, max_depth=MAX_PLY, tt_bits=18, workers=1):
+        self.color = color
+        self.ci = COLOR_INDEX[color]
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.tt_bits = tt_bits
+        self.tt = TranspositionTable(tt_bits)
+        self.workers = workers
+        self._pool = None
+        self.nodes = 0
+        self.depth = 0
+
+    def _alive(self, ci):
+        return ci not in self.disabled and self.board.king_squares[ci] is not None
+
+    def _next(self, ci):
+        """Next live color after ci, or None if nobody else is left."""
+        n = len(players_colors)
+        for k in range(1, n + 1):
+            nxt = (ci + k) % n
+            if self._alive(nxt):
+                return nxt
+        return None
+
+    def evaluate(self):
+        board = self.board
+        me = self.ci
+        if board.king_squares[me] is None:
+            return -MATE
+        score = 0
+        opponents = 0
+        for ci, squares in enumerate(board.piece_squares):
+            if ci != me and not self._alive(ci):
+                continue
+            side = 100 * board.material[ci] + sum(_CENTER[sq] for sq in squares)
+            if ci == me:
+                score += 3 * side
+            else:
+                score -= side
+                opponents += 1
+        if not opponents:
+            return MATE
+        return score
+
+    def _ordered(self, moves, tt_move, ply):
+        cells = self.board.cells
+        killers = self.killers[ply]
+        def score(move):
+            if move == tt_move:
+                return 1 << 20
+            captured = cells[move[1]]
+            if captured:
+                # most valuable victim, least valuable attacker
+                victim = KING_CAPTURE if captured & KIND_MASK == King.kind else _VALUES[captured]
+                return (1 << 16) + 16 * victim - _VALUES[cells[move[0]]]
+            if move in killers:
+                return 1 << 12
+            return 0
+        moves.sort(key=score, reverse=True)
+        return moves
+
+    def _search(self, ci, depth, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes & 1023 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        board = self.board
+        if not self._alive(self.ci) or depth == 0 or ply >= MAX_PLY:
+            return self.evaluate()
+        if ci is None:
+            return self.evaluate()
+
+        key = board.key ^ _SIDE[ci]
+        entry = self.tt.probe(key)
+        tt_move = None
+        if entry:
+            e_depth, e_value, e_flag, tt_move = entry
+            if e_depth >= depth:
+                if e_flag == EXACT:
+                    return e_value
+                if e_flag == LOWER and e_value >= beta:
+                    return e_value
+                if e_flag == UPPER and e_value <= alpha:
+                    return e_value
+
+        moves = board.generate_moves(players_colors[ci])
+        if not moves:
+            # no moves: pass the turn on
+            return self._search(self._next(ci), depth - 1, alpha, beta, ply + 1)
+
+        maximizing = ci == self.ci
+        alpha0, beta0 = alpha, beta
+        best = -MATE - 1 if maximizing else MATE + 1
+        best_move = None
+        for move in self._ordered(moves, tt_move, ply):
+            token = board.make_move(move)
+            try:
+                value = self._search(self._next(ci), depth - 1, alpha, beta, ply + 1)
+            finally:
+                board.unmake_move(token)
+            if maximizing:
+                if value > best:
+                    best, best_move = value, move
+                    alpha = max(alpha, value)
+            else:
+                if value < best:
+                    best, best_move = value, move
+                    beta = min(beta, value)
+            if alpha >= beta:
+                if not token[3]:
+                    killers = self.killers[ply]
+                    if move not in killers:
+                        killers.insert(0, move)
+                        del killers[2:]
+                break
+
+        if best <= alpha0:
+            flag = UPPER
+        elif best >= beta0:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, best, flag, best_move)
+        return best
+
+    def _root(self, moves, depth):
+        board = self.board
+        alpha, beta = -MATE - 1, MATE + 1
+        best_value, best_move = None, None
+        for move in moves:
+            token = board.make_move(move)
+            try:
+                value = self._search(self._next(self.ci), depth - 1, alpha, beta, 1)
+            finally:
+                board.unmake_move(token)
+            if best_move is None or value > best_value:
+                best_value, best_move = value, move
+                alpha = max(alpha, value)
+        return best_value, best_move
+
+    def _iterate(self, board, disabled, moves, budget):
+        """
+        Iterative deepening over the given root moves.
+        Returns [(value, move)] for every completed depth, shallowest first.
+        """
+        self.board = board.copy()
+        self.disabled = {COLOR_INDEX[c] for c in disabled}
+        self.deadline = time.perf_counter() + budget
+        self.nodes = 0
+        self.killers = [[] for _ in range(MAX_PLY + 1)]
+        self.tt.new_search()
+
+        moves = self._ordered(list(moves), None, 0)
+        results = []
+        for depth in range(1, self.max_depth + 1):
+            try:
+                value, move = self._root(moves, depth)
+            except SearchTimeout:
+                break
+            results.append((value, move))
+            # search the previous best first next iteration
+            moves.remove(move)
+            moves.insert(0, move)
+            if abs(value) >= MATE:
+                break
+        return results
+
+    def search(self, board, disabled=(), time_budget=None):
+        """
+        Return the best (from_sq, to_sq) for self.color on board, or None
+        if it has no moves. board is not modified.
+        """
+        budget = self.time_budget if time_budget is None else time_budget
+        if isinstance(board, AttackBoard):
+            # check rules: the move we play must be legal; the tree below
+            # stays pseudo-legal, where walking into check loses the king
+            enemies = [ci for c, ci in COLOR_INDEX.items() if ci != self.ci
+                       and c not in disabled and board.king_squares[ci] is not None]
+            moves = board.generate_legal_moves(self.color, enemies)
+            # the tree never reads attack maps: keeping them current on
+            # every make/unmake would only slow it down
+            board = Board.from_bytes(board.cells)
+        else:
+            moves = board.generate_moves(self.color)
+        if not moves:
+            return None
+        if self.workers > 1 and len(moves) > 1:
+            results = self._parallel(board, disabled, moves, budget)
+        else:
+            results = self._iterate(board, disabled, moves, budget)
+        self.depth = len(results)
+        if not results:
+            return moves[0]
+        return results[-1][1]
+
+    def _parallel(self, board, disabled, moves, budget):
+        """
+        Split the root moves round-robin over worker processes, each running
+        its own iterative deepening, then merge at the deepest depth every
+        worker finished.
+        """
+        if self._pool is None:
+            ctx = multiprocessing.get_context('spawn')
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=ctx)
+        self.board = board
+        self.disabled = {COLOR_INDEX[c] for c in disabled}
+        self.killers = [[]]
+        moves = self._ordered(moves, None, 0)
+        slices = [moves[i::self.workers] for i in range(self.workers)]
+        futures = [
+            self._pool.submit(_search_slice, self.color, board.to_bytes(), tuple(disabled),
+                              s, budget, self.max_depth, self.tt_bits)
+            for s in slices if s
+        ]
+        parts = []
+        self.nodes = 0
+        for f in futures:
+            results, nodes = f.result()
+            parts.append(results)
+            self.nodes += nodes
+
+        def at(results, depth):
+            if depth <= len(results):
+                return results[depth - 1]
+            # a slice that found a forced result stops deepening early
+            if results and abs(results[-1][0]) >= MATE:
+                return results[-1]
+            return None
+
+        merged = []
+        for depth in range(1, self.max_depth + 1):
+            found = [at(r, depth) for r in parts]
+            if None in found:
+                break
+            merged.append(max(found, key=lambda vm: vm[0]))
+        return merged
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+# per-process engines, so worker transposition tables survive between moves
+_worker_engines = {}
+
+def _search_slice(color, cells, disabled, moves, budget, max_depth, tt_bits):
+    engine = _worker_engines.get(color)
+    if engine is None:
+        engine = _worker_engines[color] = Engine(color, max_depth=max_depth, tt_bits=tt_bits)
+    engine.max_depth = max_depth
+    results = engine._iterate(Board.from_bytes(cells), disabled, moves, budget)
+    return results, engine.nodes
+
+class EnginePlayer:
+    """
+    Plays a set of colors of a Game from a background thread that never
+    reads the live game. The game loop hands it positions through offer()
+    (Game.on_drain), and moves come back through on_move(from_pos, to_pos,
+    color, key), normally Game.post_engine_move, which drops a move unless
+    the game is still at the position key it was searched in.
+    """
+
+    def __init__(self, game, colors, time_budget=1.0, workers=1):
+        self.engines = {c: Engine(c, time_budget, workers=workers) for c in colors}
+        self.on_move = None
+        self._jobs = SimpleQueue()      # (color, key, cells, check rules, inactive) or None
+        self._offered = None
+        self._stop = threading.Event()
+        game.on_drain = self.offer
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def offer(self, game):
+        """Game thread: queue a snapshot if one of our colors is to move."""
+        if sum(game.is_alive(c) for c in players_colors) < 2:
+            return
+        color = game.current_player().color
+        # the key includes the side to move; history length tells a
+        # repeated position from the one already queued
+        token = (game.position_key(), len(game.history))
+        if color not in self.engines or token == self._offered:
+            return
+        self._offered = token
+        self._jobs.put((color, token[0], game.board.to_bytes(), game.check_rules,
+                        frozenset(game.inactive_colors())))
+
+    def _loop(self):
+        while True:
+            job = self._jobs.get()
+            if job is None or self._stop.is_set():
+                return
+            if not self._jobs.empty():
+                continue    # the game has moved on already
+            color, key, cells, check_rules, inactive = job
+            board = (AttackBoard if check_rules else Board).from_bytes(cells)
+            move = self.engines[color].search(board, inactive)
+            if move is None or self._stop.is_set() or not self.on_move:
+                continue
+            fr, to = move
+            self.on_move(POS[fr], POS[to], color, key)
+
+    def stop(self):
+        self._stop.set()
+        self._jobs.put(None)
+        self._thread.join()
+        for engine in self.engines.values():
+            engine.close()
@@ -1,30 +1,86 @@
+from collections import Counter
+from queue import SimpleQueue, Empty
 from .board import Board
+from .attacks import AttackBoard
+from .pieces import COLOR_INDEX
 from .player import Player, players_colors
+from .record import GameRecord
+from .tables import NUM_SQUARES, POS, square
+from .resync import snapshot
+from . import metrics
 
 class Game:
-    def __init__(self):
-        self.board = Board()
+    def __init__(self, board_cls=Board, check_rules=False, history=True, record=True):
+        # check rules: no move may leave your king attacked, and a player
+        # with no legal move is out; needs the board's attack maps
+        self.check_rules = check_rules
+        if check_rules:
+            if board_cls is Board:
+                board_cls = AttackBoard
+            elif not issubclass(board_cls, AttackBoard):
+                raise TypeError("check rules need an AttackBoard")
+        self.board = board_cls()
         self.players = [Player(c) for c in players_colors]
         self.turn = 0
         self.selected = None
         self.on_remote_move = None
+        # moves from network/engine threads wait here until the game loop
+        # drains them, so only that thread ever touches the board
+        self.inbox = SimpleQueue()
+        self.on_inbox = None    # called from the posting thread, e.g. to wake the GUI
+        self.on_drain = None    # on_drain(game), on the game thread after each drain
+        self.desynced = False
+        # undo history and repetition counts grow with every ply; a game
+        # server that never undoes turns them off (record: None likewise)
+        self.keep_history = history
+        self.history = []   # (undo token, turn before the move, eliminated before)
+        self.seen = Counter([self.position_key()] if history else ())  # position key -> visits
+        self.record = GameRecord(self) if record else None
+        # legal moves of the player to move, as fr*NUM_SQUARES+to, for
+        # the position key they were generated in
+        self._legal_key = None
+        self._legal = frozenset()
 
         # track colors with no player
         self.disabled_colors = set()
+        # colors left without a legal move under check rules
+        self.eliminated = set()
 
     def disable_color(self, color):
         """Mark a color as inactive (no human/host assigned)."""
         self.disabled_colors.add(color)
 
     def is_alive(self, color):
-        """Return False if color is disabled or its king is gone."""
-        if color in self.disabled_colors:
+        """Return False if color is disabled, eliminated or its king is gone."""
+        if color in self.disabled_colors or color in self.eliminated:
             return False
-        return any(
-            piece.symbol == 'K' and piece.color == color
-            for row in self.board.grid
-            for piece in row if piece
-        )
+        return self.board.has_king(color)
+
+    def inactive_colors(self):
+        """Colors that will never move again though their pieces may remain."""
+        return self.disabled_colors | self.eliminated
+
+    def enemies(self, color):
+        """Color indices of the other live players."""
+        return [COLOR_INDEX[c] for c in players_colors if c != color and self.is_alive(c)]
+
+    def legal_moves(self, color):
+        """(from_sq, to_sq) moves color may play under the game's rules."""
+        with metrics.timed('movegen.all'):
+            if self.check_rules:
+                return self.board.generate_legal_moves(color, self.enemies(color))
+            return self.board.generate_moves(color)
+
+    def in_check(self, color):
+        return self.check_rules and self.board.in_check(color, self.enemies(color))
+
+    def position_key(self):
+        """Zobrist fingerprint of the placement plus the player to move."""
+        return self.board.position_key(self.players[self.turn].color)
+
+    def repetitions(self):
+        """How many times the current position has occurred."""
+        return self.seen[self.position_key()]
 
     def current_player(self):
         """Return the next alive (and non-disabled) player."""
@@ -39,10 +95,20 @@ class Game:
         return self.players[self.turn]
 
     def advance_turn(self):
-        """Advance to the following alive player."""
+        """
+        Advance to the following alive player. Under check rules a player
+        with no legal move is eliminated on reaching their turn.
+        """
         n = len(self.players)
         self.turn = (self.turn + 1) % n
-        while not self.is_alive(self.players[self.turn].color):
+        while True:
+            color = self.players[self.turn].color
+            if self.is_alive(color):
+                if not self.check_rules or self._legal_set(color):
+                    return
+                if sum(self.is_alive(c) for c in players_colors) < 2:
+                    return
+                self.eliminated.add(color)
             self.turn = (self.turn + 1) % n
 
     def select(self, pos):
@@ -53,7 +119,10 @@ class Game:
         piece = self.board.get_piece(pos)
         if piece and piece.color == color:
             self.selected = pos
-            return piece.legal_moves(self.board, pos)
+            with metrics.timed('movegen.select'):
+                if self.check_rules:
+                    return [POS[t] for t in self.board.legal_targets(square(pos), self.enemies(color))]
+                return self.board.legal_moves(pos)
         return []
 
     def move(self, to_pos):
@@ -64,13 +133,95 @@ class Game:
         color = self.current_player().color
         if not self.is_alive(color) or self.selected is None:
             return False
-        if self.board.move(color, self.selected, to_pos):
+        from_pos = self.selected
+        if self.check_rules and not self.is_legal(color, from_pos, to_pos):
+            return False
+        eliminated = frozenset(self.eliminated)
+        token = self.board.move(color, from_pos, to_pos)
+        if token:
+            turn = self.turn
             self.selected = None
             self.advance_turn()
+            self._played(token, turn, eliminated, color, from_pos, to_pos)
             return True
         return False
 
-    def apply_remote_move(self, from_pos, to_pos, color):
+    def _played(self, token, turn, eliminated, color, from_pos, to_pos):
+        """Bookkeeping once a move is made and the turn has passed on."""
+        if self.keep_history:
+            self.history.append((token, turn, eliminated))
+            self.seen[self.position_key()] += 1
+        if self.record is not None:
+            self.record.append(color, from_pos, to_pos)
+
+    def is_legal(self, color, from_pos, to_pos):
+        """
+        True if it is color's turn and the move is legal. The move set is
+        generated once per position, so checking costs a hash lookup.
+        """
+        if color != self.current_player().color:
+            return False
+        return square(from_pos) * NUM_SQUARES + square(to_pos) in self._legal_set(color)
+
+    def _legal_set(self, color):
+        """Legal moves of color, the player to move, cached by position key."""
+        key = self.position_key()
+        if key != self._legal_key:
+            self._legal = frozenset(fr * NUM_SQUARES + to
+                                    for fr, to in self.legal_moves(color))
+            self._legal_key = key
+        return self._legal
+
+    def post(self, fn, *args):
+        """Queue fn(*args) from another thread; drain_inbox runs it."""
+        self.inbox.put((fn, args))
+        if self.on_inbox:
+            self.on_inbox()
+
+    def post_remote_move(self, from_pos, to_pos, color, fp=None):
+        self.post(self.apply_remote_move, from_pos, to_pos, color, fp)
+
+    def post_engine_move(self, from_pos, to_pos, color, key):
+        self.post(self.apply_engine_move, from_pos, to_pos, color, key)
+
+    def apply_engine_move(self, from_pos, to_pos, color, key):
+        """Play a move searched at position key, unless the game has moved on."""
+        if key != self.position_key() or not self.is_legal(color, from_pos, to_pos):
+            return False
+        self.apply_remote_move(from_pos, to_pos, color)
+        return True
+
+    def post_restore(self, cells, turn, disabled):
+        self.post(self.restore, cells, turn, disabled)
+
+    def drain_inbox(self):
+        """Run every queued update. Returns how many there were."""
+        n = 0
+        while True:
+            try:
+                fn, args = self.inbox.get_nowait()
+            except Empty:
+                break
+            fn(*args)
+            n += 1
+        if self.on_drain:
+            self.on_drain(self)
+        return n
+
+    def restore(self, cells, turn, disabled):
+        """Jump to a snapshot (packed board, turn, inactive colors); clears history."""
+        self.board = type(self.board).from_bytes(cells)
+        self.turn = turn
+        self.disabled_colors = set(disabled)
+        self.eliminated = set()
+        self.selected = None
+        self.history = []
+        self.seen = Counter([self.position_key()] if self.keep_history else ())
+        # the record carries on from here
+        if self.record is not None:
+            self.record = GameRecord(self, start=snapshot(self))
+
+    def apply_remote_move(self, from_pos, to_pos, color, fp=None):
         """
         Apply a move received over the network.
         Fast-forwards to that color, makes the move, then advances.
@@ -83,8 +234,32 @@ class Game:
             self.turn = (self.turn + 1) % len(self.players)
 
         # apply move (no need to re-check legality here)
-        self.board.move(color, from_pos, to_pos)
+        eliminated = frozenset(self.eliminated)
+        token = self.board.move(color, from_pos, to_pos)
+        turn = self.turn
 
         # advance to next alive player
         self.advance_turn()
         self.selected = None
+        if token:
+            self._played(token, turn, eliminated, color, from_pos, to_pos)
+            # fp is the sender's position key after the move
+            if fp is not None and fp != self.position_key():
+                self.desynced = True
+                print(f"[GAME] Position mismatch after {color} move {from_pos}->{to_pos}")
+        if self.on_remote_move:
+            self.on_remote_move(from_pos, to_pos, color)
+
+    def undo(self):
+        """Take back the last move. Returns True if there was one."""
+        if not self.history:
+            return False
+        token, turn, eliminated = self.history.pop()
+        self.seen[self.position_key()] -= 1
+        self.board.unmake_move(token)
+        self.turn = turn
+        self.eliminated = set(eliminated)
+        self.selected = None
+        if self.record is not None:
+            self.record.pop()
+        return True
@@ -1,11 +1,19 @@
 import pygame
 from .game import Game
+from . import metrics
 from .player import players_colors, player_names
-from .pieces import Pawn, Rook, Knight, Bishop, Queen, King
+from .tables import is_forbidden, POS
+from . import sprites
 
 CELL = 800 // 14
 FPS = 30
 TEXT_HEIGHT = 30
+IDLE_TIMEOUT_MS = 1000
+WAKE_EVENT = pygame.USEREVENT + 1   # posted by other threads after a remote move
+STATS_KEY = pygame.K_F3             # toggles the timing overlay
+STATS_TEXT_HEIGHT = 18
+# the window was uncovered or restored and its contents may be gone
+EXPOSE_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED)
 
 # outline colors per player in multiplayer
 OUTLINE_COLORS = {
@@ -16,106 +24,240 @@ OUTLINE_COLORS = {
 }
 
 class GUI:
-    def __init__(self, game: Game, local_color=None, network=None):
+    def __init__(self, game: Game, local_color=None, network=None, event_driven=True, cell=CELL):
         pygame.init()
         pygame.font.init()
         self.game = game
         self.local_color = local_color
         self.network = network
-        self.window = pygame.display.set_mode((CELL*14, CELL*14 + TEXT_HEIGHT))
+        self.cell = cell
+        self.window = pygame.display.set_mode((self.cell*14, self.cell*14 + TEXT_HEIGHT), pygame.RESIZABLE)
         pygame.display.set_caption("4-Player Chess")
         self.clock = pygame.time.Clock()
         self.font = pygame.font.SysFont(None, TEXT_HEIGHT)
-        self.images = self._load_images()
+        self._load_images()
+        self.background = self._render_background()
+        self.valid_moves = []
+        # event_driven: block while idle and redraw only changed squares;
+        # otherwise redraw the whole window at a fixed FPS
+        self.event_driven = event_driven
+        self._last_frame = None
+        self.show_stats = False
+        self.stats_font = pygame.font.SysFont(None, STATS_TEXT_HEIGHT)
+        game.on_inbox = self.wake
 
     def _load_images(self):
-        imgs = {}
-        for color in players_colors:
-            for cls in [Pawn, Rook, Knight, Bishop, Queen, King]:
-                key = (color, cls.symbol)
-                img = pygame.image.load(f"assets/{color}{cls.symbol}.png").convert_alpha()
-                imgs[key] = pygame.transform.scale(img, (CELL, CELL))
-        return imgs
+        # shared per-size caches cut from one atlas; the dimmed set is for
+        # eliminated colors
+        self.images = sprites.sprite_set(self.cell)
+        self.dimmed = sprites.sprite_set(self.cell, dimmed=True)
+
+    def _resize(self, width, height):
+        cell = max(8, min(width, height - TEXT_HEIGHT) // 14)
+        if cell != self.cell:
+            self.cell = cell
+            self._load_images()
+            self.background = self._render_background()
+        self.window = pygame.display.set_mode((width, height), pygame.RESIZABLE)
+        self._last_frame = None     # force a full redraw
+
+    def _render_background(self):
+        """Checkerboard and forbidden corners, drawn once."""
+        surf = pygame.Surface((self.cell*14, self.cell*14)).convert()
+        for r in range(14):
+            for c in range(14):
+                rect = pygame.Rect(c*self.cell, r*self.cell, self.cell, self.cell)
+                if self._is_forbidden((r, c)):
+                    pygame.draw.rect(surf, (0, 0, 0), rect)
+                else:
+                    color = (235, 209, 166) if (r + c) % 2 == 0 else (165, 117, 81)
+                    pygame.draw.rect(surf, color, rect)
+        return surf
 
     def _is_forbidden(self, pos):
+        return is_forbidden(pos)
+
+    def _status(self, dead):
+        current = self.game.current_player().color
+        if current in dead:
+            return "Player " + player_names[current] + " eliminated"
+        check = " (check)" if self.game.in_check(current) else ""
+        if self.local_color and current != self.local_color:
+            return f"Waiting for player {player_names[current]}{check}"
+        return f"{player_names[current]}'s turn{check}"
+
+    def _draw_square(self, pos, sprites_for):
+        """Redraw one square: background, piece, selection and move hint."""
         r, c = pos
-        return (r < 3 and c < 3) or (r < 3 and c >= 11) or (r >= 11 and c < 3) or (r >= 11 and c >= 11)
+        rect = pygame.Rect(c*self.cell, r*self.cell, self.cell, self.cell)
+        self.window.blit(self.background, rect, rect)
+        piece = self.game.board.get_piece(pos)
+        if piece:
+            self.window.blit(sprites_for(piece.color)[(piece.color, piece.symbol)], rect)
+        if pos == self.game.selected:
+            pygame.draw.rect(self.window, (255, 255, 0), rect, 4)
+        if pos in self.valid_moves:
+            pygame.draw.circle(self.window, (0, 255, 0), rect.center, 10)
+        return rect
+
+    def _draw_outline(self, dead):
+        # multiplayer outline for your color if still alive
+        if self.local_color and self.local_color not in dead:
+            outline = OUTLINE_COLORS.get(self.local_color, (255, 255, 255))
+            pygame.draw.rect(self.window, outline, (0, 0, self.cell*14, self.cell*14), 4)
+
+    def _draw_status(self, msg):
+        # turn message area
+        rect = pygame.Rect(0, self.cell*14, self.cell*14, TEXT_HEIGHT)
+        pygame.draw.rect(self.window, (0, 0, 0), rect)
+        surf = self.font.render(msg, True, (255, 255, 255))
+        self.window.blit(surf, (10, self.cell*14 + (TEXT_HEIGHT - surf.get_height())//2))
+        return rect
+
+    def _draw_stats(self):
+        """Timing overlay in the top-left corner."""
+        lines = metrics.report_lines() or ["collecting..."]
+        surfs = [self.stats_font.render(line, True, (255, 255, 255)) for line in lines]
+        panel = pygame.Surface((max(s.get_width() for s in surfs) + 10,
+                                sum(s.get_height() for s in surfs) + 10), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        y = 5
+        for surf in surfs:
+            panel.blit(surf, (5, y))
+            y += surf.get_height()
+        self.window.blit(panel, (5, 5))
 
     def draw(self):
+        with metrics.timed('gui.draw'):
+            self._draw()
+
+    def _draw(self):
         # determine eliminated players
         dead = {c for c in players_colors if not self.game.is_alive(c)}
 
         # draw board cells
-        for r in range(14):
-            for c in range(14):
-                rect = pygame.Rect(c*CELL, r*CELL, CELL, CELL)
-                if self._is_forbidden((r, c)):
-                    pygame.draw.rect(self.window, (0, 0, 0), rect)
-                else:
-                    color = (235, 209, 166) if (r + c) % 2 == 0 else (165, 117, 81)
-                    pygame.draw.rect(self.window, color, rect)
+        self.window.blit(self.background, (0, 0))
 
         # highlight selected tile
         if self.game.selected:
             r, c = self.game.selected
-            pygame.draw.rect(self.window, (255, 255, 0), (c*CELL, r*CELL, CELL, CELL), 4)
+            pygame.draw.rect(self.window, (255, 255, 0), (c*self.cell, r*self.cell, self.cell, self.cell), 4)
 
         # draw pieces, dim eliminated
-        for r in range(14):
-            for c in range(14):
-                piece = self.game.board.get_piece((r, c))
-                if piece:
-                    img = self.images[(piece.color, piece.symbol)].copy()
-                    if piece.color in dead:
-                        img.set_alpha(100)
-                    self.window.blit(img, (c*CELL, r*CELL))
+        for color in players_colors:
+            imgs = self.dimmed if color in dead else self.images
+            for (r, c), piece in self.game.board.pieces_of(color):
+                self.window.blit(imgs[(color, piece.symbol)], (c*self.cell, r*self.cell))
 
-        # multiplayer outline for your color if still alive
-        if self.local_color and self.local_color not in dead:
-            outline = OUTLINE_COLORS.get(self.local_color, (255, 255, 255))
-            pygame.draw.rect(self.window, outline, (0, 0, CELL*14, CELL*14), 4)
+        # highlight valid destinations
+        for mr, mc in self.valid_moves:
+            pygame.draw.circle(self.window, (0, 255, 0), (mc*self.cell + self.cell//2, mr*self.cell + self.cell//2), 10)
 
-        # turn message area
-        pygame.draw.rect(self.window, (0, 0, 0), (0, CELL*14, CELL*14, TEXT_HEIGHT))
-        current = self.game.current_player().color
-        if current in dead:
-            msg = "Player " + player_names[current] + " eliminated"
-        elif self.local_color and current != self.local_color:
-            msg = f"Waiting for player {player_names[current]}"
+        self._draw_outline(dead)
+        self._draw_status(self._status(dead))
+
+    def render(self):
+        """
+        Redraw only what changed since the last frame: squares whose piece,
+        selection or hint changed, plus the status bar. Returns False when
+        nothing needed drawing.
+        """
+        with metrics.timed('gui.render'):
+            return self._render()
+
+    def _render(self):
+        dead = frozenset(c for c in players_colors if not self.game.is_alive(c))
+        state = (bytes(self.game.board.cells), self.game.selected,
+                 frozenset(self.valid_moves), dead, self._status(dead))
+        last, self._last_frame = self._last_frame, state
+        if state == last:
+            return False
+        if last is None or last[3] != dead:
+            # first frame or a color was eliminated: re-dim everything
+            self.draw()
+            pygame.display.flip()
+            return True
+
+        cells, selected, hints, _, msg = state
+        old_cells, old_selected, old_hints, _, old_msg = last
+        changed = {POS[sq] for sq in range(len(cells)) if cells[sq] != old_cells[sq]}
+        changed |= hints ^ old_hints
+        if selected != old_selected:
+            changed |= {p for p in (selected, old_selected) if p}
+
+        sprites_for = lambda color: self.dimmed if color in dead else self.images
+        rects = [self._draw_square(pos, sprites_for) for pos in changed]
+        self._draw_outline(dead)
+        if msg != old_msg:
+            rects.append(self._draw_status(msg))
+        pygame.display.update(rects)
+        return True
+
+    def wake(self, *args):
+        """Wake a blocked run loop; safe to call from any thread."""
+        pygame.event.post(pygame.event.Event(WAKE_EVENT))
+
+    def toggle_stats(self):
+        """Show or hide the timing overlay; collection starts on first use."""
+        self.show_stats = not self.show_stats
+        if self.show_stats:
+            metrics.enable()
+        self._last_frame = None     # force a full redraw
+
+    def _click(self, screen_pos):
+        pos = (screen_pos[1]//self.cell, screen_pos[0]//self.cell)
+        if pos[0] >= 14 or pos[1] >= 14 or self._is_forbidden(pos):
+            return
+        # skip if dead or not your turn in multiplayer
+        if self.local_color and (not self.game.is_alive(self.local_color) or self.game.current_player().color != self.local_color):
+            return
+        piece = self.game.board.get_piece(pos)
+        # select or re-select your piece
+        if not self.game.selected or (piece and piece.color == self.game.current_player().color):
+            # move tables never target the forbidden corners
+            self.valid_moves = self.game.select(pos)
         else:
-            msg = f"{player_names[current]}'s turn"
-        surf = self.font.render(msg, True, (255, 255, 255))
-        self.window.blit(surf, (10, CELL*14 + (TEXT_HEIGHT - surf.get_height())//2))
+            sel = self.game.selected
+            if self.game.move(pos):
+                if self.network:
+                    self.network.send_move(sel, pos)
+                self.valid_moves = []
 
     def run(self):
-        valid_moves = []
         running = True
         while running:
-            self.clock.tick(FPS)
-            for e in pygame.event.get():
-                if e.type == pygame.QUIT:
-                    running = False
-                elif e.type == pygame.MOUSEBUTTONDOWN:
-                    pos = (e.pos[1]//CELL, e.pos[0]//CELL)
-                    if self._is_forbidden(pos):
-                        continue
-                    # skip if dead or not your turn in multiplayer
-                    if self.local_color and (not self.game.is_alive(self.local_color) or self.game.current_player().color != self.local_color):
-                        continue
-                    piece = self.game.board.get_piece(pos)
-                    # select or re-select your piece
-                    if not self.game.selected or (piece and piece.color == self.game.current_player().color):
-                        raw = self.game.select(pos)
-                        valid_moves = [m for m in raw if not self._is_forbidden(m)]
-                    else:
-                        sel = self.game.selected
-                        if self.game.move(pos):
-                            if self.network:
-                                self.network.send_move(sel, pos)
-                            valid_moves = []
+            if self.event_driven:
+                # sleep until input, a remote move or the idle timeout
+                events = [pygame.event.wait(IDLE_TIMEOUT_MS)] + pygame.event.get()
+            else:
+                self.clock.tick(FPS)
+                events = pygame.event.get()
+            with metrics.timed('gui.frame'):
+                running = self._frame(events)
+        pygame.quit()
+
+    def _frame(self, events):
+        """Handle one batch of events and redraw; returns False on quit."""
+        running = True
+        for e in events:
+            if e.type == pygame.QUIT:
+                running = False
+            elif e.type == pygame.MOUSEBUTTONDOWN:
+                self._click(e.pos)
+            elif e.type == pygame.KEYDOWN and e.key == STATS_KEY:
+                self.toggle_stats()
+            elif e.type == pygame.VIDEORESIZE:
+                self._resize(e.w, e.h)
+            elif e.type in EXPOSE_EVENTS:
+                self._last_frame = None     # force a full redraw
+        # remote and engine moves are applied here, on this thread only
+        self.game.drain_inbox()
+        if self.event_driven and not self.show_stats:
+            self.render()
+        else:
             self.draw()
-            # highlight valid destinations
-            for mr, mc in valid_moves:
-                pygame.draw.circle(self.window, (0, 255, 0), (mc*CELL + CELL//2, mr*CELL + CELL//2), 10)
+            if self.show_stats:
+                self._draw_stats()
+                self._last_frame = None     # the overlay covers squares render() skips
             pygame.display.flip()
-        pygame.quit()
+        return running
@@ -0,0 +1,91 @@
+"""
+RSA handshake keys generated off the UI thread.
+
+A KeyPool hands out futures for fresh private keys and keeps a few
+pre-generated ones ready, refilling in the background. With a path it
+also persists spare keys on disk (one PEM per file, used once and then
+deleted) so even the first game after a restart starts instantly.
+"""
+import os
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives import serialization
+
+KEY_SIZE = 2048
+
+def generate_key():
+    return rsa.generate_private_key(65537, KEY_SIZE)
+
+class KeyPool:
+    def __init__(self, size=2, path=None):
+        self.size     = size
+        self.path     = path
+        self._ready   = deque()    # futures, oldest first
+        self._lock    = threading.Lock()
+        self._workers = ThreadPoolExecutor(1, thread_name_prefix="keygen")
+        if path:
+            os.makedirs(path, mode=0o700, exist_ok=True)
+
+    def _from_disk(self):
+        """Claim one stored key (removing its file), or None."""
+        if not self.path:
+            return None
+        for name in sorted(os.listdir(self.path)):
+            if not name.endswith(".pem"):
+                continue
+            file = os.path.join(self.path, name)
+            try:
+                with open(file, "rb") as f:
+                    data = f.read()
+                os.remove(file)
+            except OSError:
+                continue    # claimed by another process
+            return serialization.load_pem_private_key(data, password=None)
+        return None
+
+    def _to_disk(self, key):
+        file = os.path.join(self.path, f"{uuid.uuid4().hex}.pem")
+        data = key.private_bytes(serialization.Encoding.PEM,
+                                 serialization.PrivateFormat.PKCS8,
+                                 serialization.NoEncryption())
+        fd = os.open(file + ".tmp", os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(file + ".tmp", file)
+
+    def _stored(self):
+        if not self.path:
+            return 0
+        return sum(name.endswith(".pem") for name in os.listdir(self.path))
+
+    def prefetch(self):
+        """Top the pool up in the background; never blocks."""
+        with self._lock:
+            while len(self._ready) < self.size:
+                self._ready.append(self._workers.submit(generate_key))
+        if self.path:
+            self._workers.submit(self._refill_disk)
+
+    def _refill_disk(self):
+        while self._stored() < self.size:
+            self._to_disk(generate_key())
+
+    def get(self):
+        """Return a Future for an unused private key and refill behind it."""
+        key = self._from_disk()
+        if key is not None:
+            future = Future()
+            future.set_result(key)
+        else:
+            with self._lock:
+                future = self._ready.popleft() if self._ready else None
+            if future is None:
+                future = self._workers.submit(generate_key)
+        self.prefetch()
+        return future
+
+default_pool = KeyPool()
@@ -0,0 +1,149 @@
+"""
+Low-overhead timers, counters and latency histograms.
+
+Nothing is collected until enable() is called. Until then timed() hands
+back one shared do-nothing context manager and count()/observe() return
+at once, so the hooks can stay in hot paths:
+
+    with metrics.timed('gui.draw'):
+        ...
+    metrics.count('net.rejected')
+    metrics.observe('net.rtt', seconds)
+
+Durations go into log-scale histograms, SUB buckets per doubling, so a
+percentile is off by at most ~9% and a histogram stays a few hundred
+buckets however long the process runs. snapshot() summarises everything;
+dump_every() appends one snapshot per interval to a JSON lines file for
+headless runs.
+"""
+import json
+import math
+import threading
+import time
+from contextlib import nullcontext
+
+SUB = 8                     # histogram buckets per doubling
+PERCENTILES = (50, 90, 99)
+
+enabled   = False
+_lock     = threading.Lock()
+_hists    = {}              # name->Histogram
+_counters = {}              # name->int
+_NULL     = nullcontext()
+
+class Histogram:
+    __slots__ = ('buckets', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.buckets = {}   # bucket->count
+        self.count   = 0
+        self.total   = 0.0
+        self.max     = 0.0
+
+    def add(self, value):
+        m, e = math.frexp(max(value, 1e-9))     # value = m * 2**e, 0.5 <= m < 1
+        b = e * SUB + int((m - 0.5) * 2 * SUB)
+        self.buckets[b] = self.buckets.get(b, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        """Upper edge of the bucket holding the p-th percentile (capped at max)."""
+        rank = p / 100 * self.count
+        seen = 0
+        for b in sorted(self.buckets):
+            seen += self.buckets[b]
+            if seen >= rank:
+                e, k = divmod(b, SUB)
+                return min(math.ldexp(0.5 + (k + 1) / (2 * SUB), e), self.max)
+        return self.max
+
+    def summary(self):
+        """Count plus mean, percentiles and max in milliseconds."""
+        s = {'count': self.count, 'mean_ms': 1000 * self.total / max(self.count, 1)}
+        for p in PERCENTILES:
+            s[f'p{p}_ms'] = 1000 * self.percentile(p)
+        s['max_ms'] = 1000 * self.max
+        return s
+
+class _Timer:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+def reset():
+    with _lock:
+        _hists.clear()
+        _counters.clear()
+
+def timed(name):
+    """Context manager adding its duration to histogram name."""
+    return _Timer(name) if enabled else _NULL
+
+def observe(name, seconds):
+    """Add one duration measured elsewhere (e.g. a round trip)."""
+    if not enabled:
+        return
+    with _lock:
+        hist = _hists.get(name)
+        if hist is None:
+            hist = _hists[name] = Histogram()
+        hist.add(seconds)
+
+def count(name, n=1):
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+def snapshot():
+    """{'counters': {name: n}, 'timers': {name: summary}} of everything so far."""
+    with _lock:
+        return {
+            'counters': dict(_counters),
+            'timers':   {name: h.summary() for name, h in _hists.items()},
+        }
+
+def report_lines():
+    """One line of text per timer and counter, for the overlay or a console."""
+    snap = snapshot()
+    lines = []
+    for name, s in sorted(snap['timers'].items()):
+        pcts = " ".join(f"p{p} {s[f'p{p}_ms']:.2f}" for p in PERCENTILES)
+        lines.append(f"{name}: n={s['count']} {pcts} max {s['max_ms']:.2f} ms")
+    for name, n in sorted(snap['counters'].items()):
+        lines.append(f"{name}: {n}")
+    return lines
+
+def dump(path):
+    """Append a timestamped snapshot to path as one JSON line."""
+    with open(path, 'a') as f:
+        f.write(json.dumps({'time': time.time(), **snapshot()}) + "\n")
+
+def dump_every(path, interval=10.0):
+    """
+    Enable collection and dump to path every interval seconds on a daemon
+    thread. Returns an Event; set it to stop.
+    """
+    enable()
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval):
+            dump(path)
+    threading.Thread(target=loop, daemon=True).start()
+    return stop
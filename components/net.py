@@ -1,35 +1,274 @@
 import socket
+import selectors
 import threading
 import json
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
+import hmac
+import hashlib
+import os
+import struct
+import time
+from queue import SimpleQueue
+from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.exceptions import InvalidSignature
 
-def send_json(sock, msg):
-    sock.sendall((json.dumps(msg) + "\n").encode())
+from .game import Game
+from .player import players_colors
+from .tables import POS, square
+from .resync import MoveLog, decode
+from . import keys, metrics
 
-def recv_json(sock):
-    buf = b""
-    while not buf.endswith(b"\n"):
-        chunk = sock.recv(4096)
-        if not chunk:
+PSS    = padding.PSS(mgf=padding.MGF1(hashes.SHA256()),
+                     salt_length=padding.PSS.MAX_LENGTH)
+OAEP   = padding.OAEP(mgf=padding.MGF1(hashes.SHA256()),
+                      algorithm=hashes.SHA256(), label=None)
+
+# compact move: link sequence, game sequence, color index, from square,
+# to square, fingerprint
+MOVE   = struct.Struct("!IIBBBQ")
+SEQ    = struct.Struct("!I")
+MAC_SIZE = 16   # HMAC-SHA256 truncated to 128 bits
+TO_CLIENT, TO_HOST = b"\x01", b"\x02"   # direction tags mixed into every MAC
+
+# frame: 4-byte body length, 1-byte kind, body
+HEADER = struct.Struct("!IB")
+JSON_FRAME, MOVE_FRAME, SYNC_FRAME = 1, 2, 3
+MAX_FRAME = 1 << 20
+
+RECONNECT_DELAYS = (0.5, 1, 2, 4, 8)   # seconds before each reconnect attempt
+RESUME_TIMEOUT = 10                    # seconds a resuming peer gets to identify itself
+PING_EVERY = 5                         # seconds between round-trip probes (metrics on)
+
+class Connection:
+    """
+    Length-prefixed frames over one socket. Received bytes go straight
+    into a persistent buffer with recv_into, so nothing after a frame
+    boundary is ever lost and there is no per-chunk reallocation.
+    """
+    def __init__(self, sock, bufsize=65536):
+        self.sock   = sock
+        self._buf   = bytearray(bufsize)
+        self._start = 0            # first unread byte
+        self._end   = 0            # end of received data
+        self._out   = bytearray()  # queued outbound bytes (non-blocking mode)
+        self._send_lock = threading.Lock()
+
+    def send(self, kind, body):
+        with self._send_lock:
+            self.sock.sendall(HEADER.pack(len(body), kind) + body)
+
+    def queue(self, kind, body):
+        """Append a frame to the outbound queue; flush() writes it."""
+        with self._send_lock:
+            self._out += HEADER.pack(len(body), kind)
+            self._out += body
+
+    def pending(self):
+        return bool(self._out)
+
+    def flush(self):
+        """Write as much queued data as the socket takes without blocking."""
+        with self._send_lock:
+            while self._out:
+                try:
+                    n = self.sock.send(self._out)
+                except (BlockingIOError, InterruptedError):
+                    break
+                del self._out[:n]
+            return not self._out
+
+    def read_frames(self):
+        """Non-blocking: one recv_into, then every complete frame buffered."""
+        try:
+            self._fill()
+        except (BlockingIOError, InterruptedError):
+            return []
+        frames = []
+        frame = self._frame()
+        while frame is not None:
+            frames.append(frame)
+            frame = self._frame()
+        return frames
+
+    def send_json(self, msg):
+        self.send(JSON_FRAME, json.dumps(msg).encode())
+
+    def _frame(self):
+        """Pop one complete (kind, body) from the buffer, or None."""
+        avail = self._end - self._start
+        if avail < HEADER.size:
+            return None
+        size, kind = HEADER.unpack_from(self._buf, self._start)
+        if size > MAX_FRAME:
+            raise ConnectionError("frame too large")
+        if avail < HEADER.size + size:
+            if HEADER.size + size > len(self._buf):
+                self._buf.extend(bytes(HEADER.size + size - len(self._buf)))
+            return None
+        body_start = self._start + HEADER.size
+        body = bytes(self._buf[body_start:body_start + size])
+        self._start = body_start + size
+        return kind, body
+
+    def _fill(self):
+        """One recv_into at the end of the buffer; raises on EOF."""
+        if self._start == self._end:
+            self._start = self._end = 0
+        elif self._end == len(self._buf):
+            # slide the partial frame to the front
+            self._buf[:self._end - self._start] = self._buf[self._start:self._end]
+            self._end -= self._start
+            self._start = 0
+        n = self.sock.recv_into(memoryview(self._buf)[self._end:])
+        if not n:
             raise ConnectionError()
-        buf += chunk
-    return json.loads(buf.decode().strip())
+        self._end += n
+
+    def recv(self):
+        """Block until a whole frame arrives; returns (kind, body)."""
+        while True:
+            frame = self._frame()
+            if frame is not None:
+                return frame
+            self._fill()
+
+    def recv_json(self):
+        kind, body = self.recv()
+        if kind != JSON_FRAME:
+            raise ConnectionError("expected a JSON frame")
+        return json.loads(body)
+
+    def close(self):
+        self.sock.close()
+
+def _json_dict(body):
+    """A JSON object frame as a dict, or None if the peer sent anything else."""
+    try:
+        msg = json.loads(body)
+    except ValueError:     # bad UTF-8 or JSON
+        return None
+    return msg if isinstance(msg, dict) else None
+
+def pem(public_key):
+    return public_key.public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+
+class Session:
+    """
+    HMAC-SHA256 authentication for one host<->client link. The key is
+    agreed once during the RSA handshake; each direction numbers its
+    messages so a captured packet cannot be replayed, and tags its MACs
+    so one cannot be reflected back to its sender either.
+    """
+    def __init__(self, key, is_host=False):
+        self.key      = key
+        self.send_seq = 0
+        self.recv_seq = 0
+        self._out     = TO_CLIENT if is_host else TO_HOST
+        self._in      = TO_HOST if is_host else TO_CLIENT
+
+    def _mac(self, direction, payload):
+        return hmac.new(self.key, direction + payload, hashlib.sha256).digest()[:MAC_SIZE]
+
+    def seal_move(self, color, from_pos, to_pos, fp=None, game_seq=0):
+        """Binary MOVE frame body: packed move followed by its MAC."""
+        with metrics.timed('crypto.seal'):
+            self.send_seq += 1
+            payload = MOVE.pack(self.send_seq, game_seq, players_colors.index(color),
+                                square(from_pos), square(to_pos), fp or 0)
+            return payload + self._mac(self._out, payload)
+
+    def open_move(self, body):
+        """
+        Return (color, from, to, fp, game_seq) if body is authentic and
+        fresh, else None.
+        """
+        if len(body) != MOVE.size + MAC_SIZE:
+            return None
+        payload, mac = body[:MOVE.size], body[MOVE.size:]
+        with metrics.timed('crypto.open'):
+            authentic = hmac.compare_digest(mac, self._mac(self._in, payload))
+        if not authentic:
+            return None
+        seq, game_seq, ci, fr, to, fp = MOVE.unpack(payload)
+        if seq <= self.recv_seq:
+            return None
+        self.recv_seq = seq
+        return players_colors[ci], POS[fr], POS[to], fp or None, game_seq
+
+    def seal_sync(self, data):
+        """Binary SYNC frame body: link sequence, resync payload, MAC."""
+        self.send_seq += 1
+        payload = SEQ.pack(self.send_seq) + data
+        return payload + self._mac(self._out, payload)
+
+    def open_sync(self, body):
+        """Return the resync payload if body is authentic and fresh, else None."""
+        payload, mac = body[:-MAC_SIZE], body[-MAC_SIZE:]
+        if len(payload) < SEQ.size or not hmac.compare_digest(mac, self._mac(self._in, payload)):
+            return None
+        seq, = SEQ.unpack_from(payload)
+        if seq <= self.recv_seq:
+            return None
+        self.recv_seq = seq
+        return payload[SEQ.size:]
+
+    def resume_mac(self, color, last_seq):
+        """Proof, for a resume request, that we hold this link's key."""
+        # only ever sent by a client
+        return self._mac(TO_HOST, b"resume" + color.encode() + SEQ.pack(last_seq))
+
+def new_session(peer_key, signing_key):
+    """
+    Fresh link key for a peer: returns the Session plus the init/resync
+    fields carrying it RSA-encrypted to the peer and signed by us.
+    """
+    key = os.urandom(32)
+    sealed = peer_key.encrypt(key, OAEP)
+    sig = signing_key.sign(sealed, PSS, hashes.SHA256())
+    return Session(key, is_host=True), {"session":sealed.hex(), "session_sig":sig.hex()}
+
+class _KeyHolder:
+    """RSA key pair from a KeyPool future; first use waits for it."""
+    @property
+    def private_key(self):
+        return self._key.result()
 
-class HostNetwork:
-    def __init__(self, port=5000, min_players=2, max_players=4):
+    @property
+    def public_key(self):
+        return self.private_key.public_key()
+
+class HostNetwork(_KeyHolder):
+    def __init__(self, port=5000, min_players=2, max_players=4, key_pool=None,
+                 check_rules=False):
         self.port         = port
+        self.check_rules  = check_rules
         self.min_players  = min_players
         self.max_players  = max_players
-        self.clients      = {}     # (addr)->socket
+        self.clients      = {}     # (addr)->Connection
         self.peer_pubkeys = {}     # color->public key
         self.assignments  = {}     # (addr)->color
-        self.on_move      = None   # callback(fr,to,color)
+        self.sessions     = {}     # (addr)->Session
+        self.on_move      = None   # callback(fr,to,color,fp), called on the relay thread
+        self.on_restore   = None   # callback(cells,turn,disabled) if our own move is refused
+        self.fingerprint  = None   # callable() -> position key after a move
         self.color        = None
+        # our own copy of the game, kept by the relay, for resyncing clients
+        self.game         = None
+        self.log          = None
 
-        self.private_key  = rsa.generate_private_key(65537, 2048)
-        self.public_key   = self.private_key.public_key()
+        # generated in the background; the handshake thread waits for it
+        self._key         = (key_pool or keys.default_pool).get()
         self._shutdown    = False
+        self._started     = False
+        self._send_lock   = threading.Lock()
+        self._selector    = selectors.DefaultSelector()
+        # lets other threads wake the relay loop when they queue frames
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._adopt       = SimpleQueue()   # (stale conn, addr) from resumes
 
         self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server.bind(('0.0.0.0', self.port))
@@ -37,14 +276,24 @@ class HostNetwork:
         threading.Thread(target=self._accept_loop, daemon=True).start()
 
     def _accept_loop(self):
-        while not self._shutdown and len(self.clients) < self.max_players:
-            sock, addr = self.server.accept()
-            self.clients[addr] = sock
+        while not self._shutdown:
+            try:
+                sock, addr = self.server.accept()
+            except OSError:
+                return
+            if self._started:
+                # only dropped players coming back
+                threading.Thread(target=self._resume, args=(sock, addr), daemon=True).start()
+                continue
+            if len(self.clients) >= self.max_players:
+                sock.close()
+                continue
+            self.clients[addr] = Connection(sock)
             print(f"[HOST] Client connected: {addr}")
 
     def start_game(self):
-        from components.player import players_colors
         import random
+        self._started = True
         pool = players_colors.copy()
         random.shuffle(pool)
 
@@ -54,121 +303,399 @@ class HostNetwork:
         for addr in self.clients:
             self.assignments[addr] = pool.pop()
 
-        for addr, sock in self.clients.items():
-            send_json(sock, {"type":"assign","color":self.assignments[addr]})
+        self.game = Game(check_rules=self.check_rules, history=False, record=False)
+        for c in pool:
+            self.game.disable_color(c)
+        self.log = MoveLog(self.game)
+
+        for addr, conn in self.clients.items():
+            conn.send_json({"type":"assign","color":self.assignments[addr]})
 
         self.peer_pubkeys[self.color] = self.public_key
-        for addr, sock in self.clients.items():
-            msg = recv_json(sock)
+        for addr, conn in self.clients.items():
+            msg = conn.recv_json()
             pub = serialization.load_pem_public_key(msg["pem"].encode())
-            self.peer_pubkeys[msg["color"]] = pub
+            self.peer_pubkeys[self.assignments[addr]] = pub
 
         init = {
             "type":        "init",
+            "host_color":  self.color,
+            "check_rules": self.check_rules,
             "assignments": {str(k):v for k,v in self.assignments.items()},
-            "pubkeys":     {}
+            "pubkeys":     {c: pem(pub) for c, pub in self.peer_pubkeys.items()}
         }
-        for c, pub in self.peer_pubkeys.items():
-            init["pubkeys"][c] = pub.public_bytes(
-                serialization.Encoding.PEM,
-                serialization.PublicFormat.SubjectPublicKeyInfo
-            ).decode()
 
-        for sock in self.clients.values():
-            send_json(sock, init)
+        # one fresh session key per client, RSA-encrypted to that client and
+        # signed by us; every later move is authenticated with HMAC only
+        for addr, conn in self.clients.items():
+            self.sessions[addr], sealed = new_session(
+                self.peer_pubkeys[self.assignments[addr]], self.private_key)
+            conn.send_json({**init, **sealed})
 
         threading.Thread(target=self._relay_loop, daemon=True).start()
 
+    def _resume(self, sock, addr):
+        """
+        Take a dropped player back: check the resume request against the
+        old link key, issue a new one and send whatever they missed.
+        """
+        conn = Connection(sock)
+        # a silent peer must not hold this thread forever
+        sock.settimeout(RESUME_TIMEOUT)
+        try:
+            msg = conn.recv_json()
+            color, last_seq = msg["color"], int(msg["last_seq"])
+            # other resumes change assignments under the same lock
+            with self._send_lock:
+                old = next(a for a, c in self.assignments.items()
+                           if c == color and a in self.sessions)
+                session = self.sessions[old]
+            ok = msg["type"] == "resume" and hmac.compare_digest(
+                bytes.fromhex(msg["mac"]), session.resume_mac(color, last_seq))
+        except (ConnectionError, OSError, ValueError, KeyError, TypeError, StopIteration):
+            ok = False
+        if not ok:
+            conn.close()
+            return
+        proof = session
+        session, sealed = new_session(self.peer_pubkeys[color], self.private_key)
+        # under the send lock: no move can slip between the payload and
+        # the new link joining the broadcast set
+        with self._send_lock:
+            if self.sessions.get(old) is not proof:
+                conn.close()    # another resume of this color got in first
+                return
+            conn.send_json({"type":"resync", **sealed})
+            conn.queue(SYNC_FRAME, session.seal_sync(self.log.since(last_seq)))
+            stale = self.clients.pop(old, None)
+            self.sessions.pop(old, None)
+            self.assignments.pop(old, None)
+            self.sessions[addr]    = session
+            self.assignments[addr] = color
+            self.clients[addr]     = conn
+        self._adopt.put((stale, addr))
+        self._wake_w.send(b"\0")
+        print(f"[HOST] {color} resumed from {addr} at move {last_seq}")
+
+    def _broadcast(self, color, from_pos, to_pos, fp, skip=None):
+        """Apply and relay a move if our game accepts it; returns whether it did."""
+        # check, apply, number, seal and queue under one lock so sequence
+        # numbers match the order frames go out, whichever thread is sending
+        with self._send_lock:
+            if not self.game.is_legal(color, from_pos, to_pos):
+                return False
+            self.game.apply_remote_move(from_pos, to_pos, color)
+            seq = self.log.record(color, from_pos, to_pos)
+            for addr, conn in list(self.clients.items()):
+                if addr != skip:
+                    conn.queue(MOVE_FRAME, self.sessions[addr].seal_move(
+                        color, from_pos, to_pos, fp, seq))
+        self._wake_w.send(b"\0")
+        return True
+
+    def _reject(self, addr, color, from_pos, to_pos):
+        """Send a player whose move we refused back to the real position."""
+        print(f"[HOST] Rejected {color} move {from_pos}->{to_pos} from {addr}")
+        with self._send_lock:
+            self.clients[addr].queue(SYNC_FRAME, self.sessions[addr].seal_sync(self.log.since(None)))
+
+    def _evict(self, addr):
+        conn = self.clients.pop(addr, None)
+        if conn is None:
+            return
+        try:
+            self._selector.unregister(conn.sock)
+        except KeyError:
+            pass    # resumed link not adopted yet
+        conn.close()
+        print(f"[HOST] Client {addr} ({self.assignments.get(addr)}) disconnected")
+
+    def _adopt_resumed(self):
+        while not self._adopt.empty():
+            stale, addr = self._adopt.get()
+            if stale is not None:
+                try:
+                    self._selector.unregister(stale.sock)
+                except (KeyError, ValueError):
+                    pass
+                stale.close()
+            conn = self.clients.get(addr)
+            if conn is not None:
+                conn.sock.setblocking(False)
+                self._selector.register(conn.sock, selectors.EVENT_READ, addr)
+
+    def _handle(self, addr, kind, body):
+        if kind == JSON_FRAME:
+            msg = _json_dict(body)
+            if msg is None:
+                print(f"[HOST] Dropped malformed frame from {addr}")
+            elif msg.get("type") == "ping":
+                with self._send_lock:
+                    self.clients[addr].queue(
+                        JSON_FRAME, json.dumps({"type":"pong", "t":msg.get("t")}).encode())
+            return
+        if kind != MOVE_FRAME:
+            return
+        with metrics.timed('net.relay'):
+            self._handle_move(addr, body)
+
+    def _handle_move(self, addr, body):
+        move = self.sessions[addr].open_move(body)
+        if move is None or move[0] != self.assignments[addr]:
+            print(f"[HOST] Dropped unauthenticated move from {addr}")
+            return
+        color, fr, to, fp, _ = move
+        if not self._broadcast(color, fr, to, fp, skip=addr):
+            self._reject(addr, color, fr, to)
+            return
+        if self.on_move:
+            self.on_move(fr, to, color, fp)
+
     def _relay_loop(self):
-        while True:
-            for sock in list(self.clients.values()):
+        """
+        Event-driven relay: read whichever client is ready, queue outbound
+        frames per client and write them as sockets accept data, so a slow
+        or silent player never delays anyone else. Dead peers are evicted
+        and may come back through _resume.
+        """
+        sel = self._selector
+        sel.register(self._wake_r, selectors.EVENT_READ)
+        for addr, conn in self.clients.items():
+            conn.sock.setblocking(False)
+            sel.register(conn.sock, selectors.EVENT_READ, addr)
+        while not self._shutdown:
+            for key, events in sel.select():
+                if key.fileobj is self._wake_r:
+                    self._wake_r.recv(4096)
+                    self._adopt_resumed()
+                    continue
+                addr = key.data
+                conn = self.clients.get(addr)
+                if conn is None:
+                    continue
                 try:
-                    msg = recv_json(sock)
-                except ConnectionError:
+                    if events & selectors.EVENT_READ:
+                        for kind, body in conn.read_frames():
+                            self._handle(addr, kind, body)
+                    if events & selectors.EVENT_WRITE:
+                        conn.flush()
+                except (ConnectionError, OSError):
+                    self._evict(addr)
+            # only ask for writability while something is queued
+            for addr, conn in list(self.clients.items()):
+                try:
+                    key = sel.get_key(conn.sock)
+                except KeyError:
+                    continue    # resumed link, registered on the next wake
+                try:
+                    drained = conn.flush()
+                except (ConnectionError, OSError):
+                    self._evict(addr)
                     continue
-                if msg["type"] == "move":
-                    pub = self.peer_pubkeys[msg["color"]]
-                    data = json.dumps({
-                        "type":"move","color":msg["color"],
-                        "from":msg["from"],"to":msg["to"]
-                    }).encode()
-                    sig = bytes.fromhex(msg["sig"])
-                    pub.verify(
-                        sig, data,
-                        padding.PSS(mgf=padding.MGF1(hashes.SHA256()),
-                                    salt_length=padding.PSS.MAX_LENGTH),
-                        hashes.SHA256()
-                    )
-                    for s in self.clients.values():
-                        send_json(s, msg)
-                    if self.on_move:
-                        self.on_move(tuple(msg["from"]),
-                                     tuple(msg["to"]),
-                                     msg["color"])
+                events = selectors.EVENT_READ | (0 if drained else selectors.EVENT_WRITE)
+                if key.events != events:
+                    sel.modify(conn.sock, events, addr)
 
     def send_move(self, from_pos, to_pos):
-        data   = {"type":"move","color":self.color,"from":from_pos,"to":to_pos}
-        sig    = self.private_key.sign(
-                     json.dumps(data).encode(),
-                     padding.PSS(mgf=padding.MGF1(hashes.SHA256()),
-                                 salt_length=padding.PSS.MAX_LENGTH),
-                     hashes.SHA256()
-                 ).hex()
-        packet = {**data, "sig": sig}
-        for sock in self.clients.values():
-            send_json(sock, packet)
+        fp = self.fingerprint() if self.fingerprint else None
+        if self._broadcast(self.color, from_pos, to_pos, fp):
+            return
+        # the local game let through a move ours refuses: put it back in line
+        print(f"[HOST] Own move {from_pos}->{to_pos} rejected, restoring position")
+        with self._send_lock:
+            data = self.log.since(None)
+        snap, moves, _ = decode(data)
+        if self.on_restore:
+            self.on_restore(*snap)
         if self.on_move:
-            self.on_move(from_pos, to_pos, self.color)
+            for color, fr, to in moves:
+                self.on_move(fr, to, color, None)
 
     def shutdown(self):
         self._shutdown = True
         self.server.close()
+        self._wake_w.send(b"\0")
         for s in self.clients.values():
             s.close()
 
-class ClientNetwork:
-    def __init__(self, host_ip, port=5000):
-        self.sock         = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.sock.connect((host_ip, port))
-        self.private_key  = rsa.generate_private_key(65537, 2048)
-        self.public_key   = self.private_key.public_key()
+class ClientNetwork(_KeyHolder):
+    """
+    Client of a HostNetwork, or of a GameServer room when room is given
+    ('new' creates one, anything else is a room id to join). A dropped
+    link is reopened and resumed from the last move seen.
+    """
+    def __init__(self, host_ip, port=5000, key_pool=None, room=None):
+        self.addr         = (host_ip, port)
+        self.sock         = socket.create_connection(self.addr)
+        self.conn         = Connection(self.sock)
+        self._key         = (key_pool or keys.default_pool).get()
         self.color        = None
         self.assignments  = {}
         self.peer_pubkeys = {}
-        self.on_move      = None
+        self.check_rules  = False
+        self.host_key     = None
+        self.session      = None
+        self.last_seq     = 0      # game sequence number of the last move seen
+        self.on_move      = None   # callback(fr,to,color,fp), called on the listen thread
+        self.on_restore   = None   # callback(cells,turn,disabled) for a resync snapshot
+        self.fingerprint  = None   # callable() -> position key after a move
         self.ready        = False
+        self.room         = room
+        self.room_players = 0
+        self.room_owner   = False
+        self.error        = None
+        self.winner       = None
 
         threading.Thread(target=self._handshake_and_listen, daemon=True).start()
 
+    def start_room(self):
+        """Ask the server to start our room now (room owner only)."""
+        self.conn.send_json({"type":"start"})
+
+    def _lobby(self):
+        """Create or join a server room; returns the assign message."""
+        if self.room == 'new':
+            self.conn.send_json({"type":"create"})
+        else:
+            self.conn.send_json({"type":"join","room":self.room})
+        while True:
+            msg = self.conn.recv_json()
+            if msg["type"] == "room":
+                self.room         = msg["room"]
+                self.room_players = msg["players"]
+                self.room_owner   = msg["owner"]
+            elif msg["type"] == "error":
+                raise ConnectionError(msg["error"])
+            elif msg["type"] == "assign":
+                return msg
+
+    def _open_session(self, msg):
+        """Session from a host-signed init/resync message, or None if forged."""
+        sealed = bytes.fromhex(msg["session"])
+        try:
+            self.host_key.verify(bytes.fromhex(msg["session_sig"]), sealed, PSS, hashes.SHA256())
+        except InvalidSignature:
+            print("[NET] Host session key signature invalid")
+            return None
+        return Session(self.private_key.decrypt(sealed, OAEP))
+
     def _handshake_and_listen(self):
-        msg = recv_json(self.sock)
+        try:
+            msg = self._lobby() if self.room is not None else self.conn.recv_json()
+        except ConnectionError as e:
+            self.error = str(e) or "connection closed"
+            self.sock.close()
+            return
         self.color = msg["color"]
-        pem = self.public_key.public_bytes(
-                  serialization.Encoding.PEM,
-                  serialization.PublicFormat.SubjectPublicKeyInfo
-              ).decode()
-        send_json(self.sock, {"type":"pubkey","color":self.color,"pem":pem})
+        self.conn.send_json({"type":"pubkey","color":self.color,"pem":pem(self.public_key)})
 
-        init = recv_json(self.sock)
+        init = self.conn.recv_json()
+        if init.get("type") == "error":
+            # a game server gave up on the room before it started
+            self.error = init["error"]
+            self.sock.close()
+            return
         self.assignments = init["assignments"]
-        for c, pem in init["pubkeys"].items():
-            self.peer_pubkeys[c] = serialization.load_pem_public_key(pem.encode())
+        self.check_rules = init.get("check_rules", False)
+        for c, key_pem in init["pubkeys"].items():
+            self.peer_pubkeys[c] = serialization.load_pem_public_key(key_pem.encode())
+
+        # a game server holds no color and sends its own key
+        if init.get("host_pem"):
+            self.host_key = serialization.load_pem_public_key(init["host_pem"].encode())
+        else:
+            self.host_key = self.peer_pubkeys[init["host_color"]]
+        self.session = self._open_session(init)
+        if self.session is None:
+            self.sock.close()
+            return
 
         self.ready = True
+        threading.Thread(target=self._ping_loop, daemon=True).start()
 
         while True:
-            msg = recv_json(self.sock)
-            if msg["type"]=="move" and self.on_move:
-                self.on_move(tuple(msg["from"]),
-                             tuple(msg["to"]),
-                             msg["color"])
+            try:
+                kind, body = self.conn.recv()
+            except (ConnectionError, OSError):
+                print("[NET] Disconnected from host")
+                if self.winner is None and self._reconnect():
+                    continue
+                return
+            if kind==JSON_FRAME:
+                msg = _json_dict(body)
+                if msg is None:
+                    print("[NET] Dropped malformed frame")
+                elif msg.get("type") == "over":
+                    self.winner = msg.get("winner")
+                elif msg.get("type") == "pong" and isinstance(msg.get("t"), float):
+                    metrics.observe('net.rtt', time.perf_counter() - msg["t"])
+            elif kind==SYNC_FRAME:
+                # the host refused our last move
+                data = self.session.open_sync(body)
+                if data:
+                    self._apply_sync(data)
+            elif kind==MOVE_FRAME and self.on_move:
+                move = self.session.open_move(body)
+                if move is None:
+                    print("[NET] Dropped unauthenticated move")
+                    continue
+                color, fr, to, fp, self.last_seq = move
+                self.on_move(fr, to, color, fp)
+
+    def _ping_loop(self):
+        """Probe the round trip to the host now and then while metrics are on."""
+        while self.winner is None:
+            time.sleep(PING_EVERY)
+            if metrics.enabled:
+                try:
+                    self.conn.send_json({"type":"ping", "t":time.perf_counter()})
+                except OSError:
+                    pass    # the listen thread reconnects
+
+    def _reconnect(self):
+        """Reopen the link and resume from last_seq; True once back in sync."""
+        for delay in RECONNECT_DELAYS:
+            time.sleep(delay)
+            msg = {"type":"resume", "color":self.color, "last_seq":self.last_seq,
+                   "mac":self.session.resume_mac(self.color, self.last_seq).hex()}
+            if self.room is not None:
+                msg["room"] = self.room
+            try:
+                conn = Connection(socket.create_connection(self.addr))
+                conn.send_json(msg)
+                reply = conn.recv_json()
+                if reply.get("type") != "resync":
+                    conn.close()
+                    return False
+                session = self._open_session(reply)
+                kind, body = conn.recv()
+            except (ConnectionError, OSError, ValueError):
+                continue
+            data = session and kind == SYNC_FRAME and session.open_sync(body)
+            if not data:
+                conn.close()
+                return False
+            self.sock, self.conn, self.session = conn.sock, conn, session
+            self._apply_sync(data)
+            print(f"[NET] Resumed at move {self.last_seq}")
+            return True
+        return False
+
+    def _apply_sync(self, data):
+        snap, moves, self.last_seq = decode(data)
+        if snap and self.on_restore:
+            self.on_restore(*snap)
+        if self.on_move:
+            for color, fr, to in moves:
+                self.on_move(fr, to, color, None)
 
     def send_move(self, from_pos, to_pos):
-        data   = {"type":"move","color":self.color,"from":from_pos,"to":to_pos}
-        sig    = self.private_key.sign(
-                     json.dumps(data).encode(),
-                     padding.PSS(mgf=padding.MGF1(hashes.SHA256()),
-                                 salt_length=padding.PSS.MAX_LENGTH),
-                     hashes.SHA256()
-                 ).hex()
-        send_json(self.sock, {**data, "sig":sig})
+        fp = self.fingerprint() if self.fingerprint else None
+        # the host gives our move the next number; if the send fails the
+        # resync on reconnect takes it back
+        self.last_seq += 1
+        try:
+            self.conn.send(MOVE_FRAME, self.session.seal_move(
+                self.color, from_pos, to_pos, fp, self.last_seq))
+        except OSError:
+            pass
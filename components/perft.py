@@ -0,0 +1,114 @@
+"""
+Perft: count the leaves of the move tree to a fixed depth.
+
+Turns rotate through the colors in players_colors order, skipping colors
+whose king is gone, as Game.advance_turn does. A node whose player has
+no moves, or where only one color is left, is terminal and counts
+nothing.
+
+Run from the repo root:
+    python -m components.perft [depth] [bitboard]   per-depth counts and nodes/sec
+    python -m components.perft verify [bitboard]    check the recorded counts
+"""
+import sys
+import time
+
+from .board import Board
+from .player import players_colors
+
+def _next(board, ci):
+    n = len(players_colors)
+    for k in range(1, n):
+        nxt = (ci + k) % n
+        if board.king_squares[nxt] is not None:
+            return nxt
+    return None
+
+def perft(board, color, depth):
+    """Number of leaf nodes depth plies below board with color to move."""
+    if depth == 0:
+        return 1
+    ci = players_colors.index(color)
+    if _next(board, ci) is None:
+        return 0
+    moves = board.generate_moves(color)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        token = board.make_move(move)
+        # recomputed after the move, which may have taken a king
+        nxt = _next(board, ci)
+        if nxt is not None:
+            nodes += perft(board, players_colors[nxt], depth - 1)
+        board.unmake_move(token)
+    return nodes
+
+# tricky positions, white to move
+POSITIONS = {
+    'start': None,
+    # sliders, knights and kings hugging the forbidden corners
+    'corners': {
+        (13, 3): 'wK', (3, 1): 'wB', (3, 0): 'wR', (11, 3): 'wN',
+        (0, 10): 'bK', (2, 10): 'bQ', (3, 12): 'bN',
+        (10, 13): 'rK', (10, 11): 'rB', (13, 10): 'rR',
+        (3, 2): 'gK', (10, 2): 'gQ', (2, 3): 'gN',
+    },
+    # pawns that cannot push off the board but may still capture along it
+    'edge pawns': {
+        (13, 7): 'wK', (0, 5): 'wP', (0, 6): 'bN', (3, 13): 'wP',
+        (0, 7): 'bK', (13, 6): 'bP', (13, 5): 'wR', (10, 0): 'bP',
+        (7, 13): 'rK', (7, 0): 'rP', (8, 1): 'gB', (6, 0): 'gP',
+        (7, 1): 'gK', (6, 13): 'gP', (5, 12): 'rN', (8, 13): 'rP',
+    },
+    # red has lost its king: its pieces stay on the board as targets and
+    # red is skipped in the rotation
+    'eliminated': {
+        (13, 7): 'wK', (10, 7): 'wQ', (12, 4): 'wP',
+        (7, 7): 'rQ', (5, 10): 'rR', (11, 5): 'rN', (9, 12): 'rP',
+        (0, 6): 'bK', (3, 7): 'bR', (1, 8): 'bP',
+        (6, 0): 'gK', (6, 4): 'gB', (8, 1): 'gP',
+    },
+}
+
+# recorded leaf counts per depth (index 0 is depth 1)
+REFERENCE = {
+    'start': [12, 144, 1728, 20736, 333648],
+    'corners': [26, 872, 30709, 1154759],
+    'edge pawns': [20, 200, 1600, 34040],
+    'eliminated': [44, 1144, 27678, 1083231],
+}
+
+def position(name, board_cls=Board):
+    layout = POSITIONS[name]
+    return board_cls() if layout is None else board_cls.from_pieces(layout)
+
+def run(depth=4, board_cls=Board, name='start'):
+    board = position(name, board_cls)
+    for d in range(1, depth + 1):
+        start = time.perf_counter()
+        nodes = perft(board, players_colors[0], d)
+        elapsed = time.perf_counter() - start
+        print(f"{name} depth {d}: {nodes:>10} nodes {nodes / max(elapsed, 1e-9):>12,.0f} nodes/sec")
+
+def verify(board_cls=Board):
+    """Check every recorded count; returns True if all match."""
+    ok = True
+    for name, counts in REFERENCE.items():
+        for d, expected in enumerate(counts, 1):
+            got = perft(position(name, board_cls), players_colors[0], d)
+            status = 'ok' if got == expected else f'FAIL (expected {expected})'
+            ok &= got == expected
+            print(f"{name} depth {d}: {got} {status}")
+    return ok
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    board_cls = Board
+    if 'bitboard' in args:
+        from .bitboard import BitBoard
+        board_cls = BitBoard
+        args.remove('bitboard')
+    if args and args[0] == 'verify':
+        sys.exit(0 if verify(board_cls) else 1)
+    run(int(args[0]) if args else 4, board_cls)
@@ -1,111 +1,106 @@
 from abc import ABC, abstractmethod
+from .player import players_colors
+from .tables import (
+    SIZE, POS, PAWN_DIRS, PAWN_PUSHES, PAWN_CAPTURES,
+    KNIGHT_TARGETS, KING_TARGETS, ROOK_RAYS, BISHOP_RAYS, QUEEN_RAYS,
+)
 
 # Direction vectors for pawn movement by color
-dirs = {
-    'w': (-1, 0),  # up
-    'b': ( 1, 0),  # down
-    'r': ( 0, -1),  # left
-    'g': ( 0, 1),  # right
-}
+dirs = PAWN_DIRS
+
+# Packed cell encoding shared with Board: (color index << COLOR_SHIFT) | kind
+COLOR_SHIFT = 3
+COLOR_INDEX = {color: i for i, color in enumerate(players_colors)}
+
+def _slide(cells, rays, ci, moves):
+    for ray in rays:
+        for t in ray:
+            code = cells[t]
+            if not code:
+                moves.append(t)
+            else:
+                if code >> COLOR_SHIFT != ci:
+                    moves.append(t)
+                break
+    return moves
+
+def _step(cells, targets, ci):
+    return [t for t in targets if not cells[t] or cells[t] >> COLOR_SHIFT != ci]
 
 class Piece(ABC):
     symbol = '?'  # override in subclasses
+    kind = 0      # type code used by the packed board encoding
+    value = 0     # material value
 
     def __init__(self, color):
         self.color = color
+        self.ci = COLOR_INDEX[color]
+        self.code = (self.ci << COLOR_SHIFT) | self.kind
 
     @abstractmethod
+    def targets(self, board, sq):
+        """Return list of destination square indices from square sq"""
+        pass
+
     def legal_moves(self, board, pos):
         """Return list of (r,c) legal destinations from pos"""
-        pass
+        return [POS[t] for t in self.targets(board, pos[0] * SIZE + pos[1])]
 
 class Pawn(Piece):
     symbol = 'P'
+    kind = 1
+    value = 1
 
-    def legal_moves(self, board, pos):
+    def targets(self, board, sq):
+        cells = board.cells
         moves = []
-        r, c = pos
-        dr, dc = dirs[self.color]
         # one-step forward
-        nr, nc = r + dr, c + dc
-        if board.in_bounds((nr, nc)) and board.is_empty((nr, nc)):
-            moves.append((nr, nc))
+        push = PAWN_PUSHES[self.color][sq]
+        if push is not None and not cells[push]:
+            moves.append(push)
         # captures
-        for odir in [(-dc, dr), (dc, -dr)]:
-            cr, cc = r + dr + odir[0], c + dc + odir[1]
-            if board.in_bounds((cr, cc)):
-                target = board.get_piece((cr, cc))
-                if target and target.color != self.color:
-                    moves.append((cr, cc))
+        for t in PAWN_CAPTURES[self.color][sq]:
+            code = cells[t]
+            if code and code >> COLOR_SHIFT != self.ci:
+                moves.append(t)
         return moves
 
 class Rook(Piece):
     symbol = 'R'
+    kind = 4
+    value = 5
 
-    def legal_moves(self, board, pos):
-        moves = []
-        r, c = pos
-        for dr, dc in [(1,0),(-1,0),(0,1),(0,-1)]:
-            nr, nc = r+dr, c+dc
-            while board.in_bounds((nr, nc)):
-                if board.is_empty((nr, nc)):
-                    moves.append((nr, nc))
-                else:
-                    if board.get_piece((nr, nc)).color != self.color:
-                        moves.append((nr, nc))
-                    break
-                nr += dr; nc += dc
-        return moves
+    def targets(self, board, sq):
+        return _slide(board.cells, ROOK_RAYS[sq], self.ci, [])
 
 class Bishop(Piece):
     symbol = 'B'
+    kind = 3
+    value = 3
 
-    def legal_moves(self, board, pos):
-        moves = []
-        r, c = pos
-        for dr, dc in [(1,1),(1,-1),(-1,1),(-1,-1)]:
-            nr, nc = r+dr, c+dc
-            while board.in_bounds((nr, nc)):
-                if board.is_empty((nr, nc)):
-                    moves.append((nr, nc))
-                else:
-                    if board.get_piece((nr, nc)).color != self.color:
-                        moves.append((nr, nc))
-                    break
-                nr += dr; nc += dc
-        return moves
+    def targets(self, board, sq):
+        return _slide(board.cells, BISHOP_RAYS[sq], self.ci, [])
 
 class Knight(Piece):
     symbol = 'N'
+    kind = 2
+    value = 3
 
-    def legal_moves(self, board, pos):
-        moves = []
-        r, c = pos
-        for dr, dc in [(2,1),(2,-1),(-2,1),(-2,-1),(1,2),(1,-2),(-1,2),(-1,-2)]:
-            nr, nc = r+dr, c+dc
-            if board.in_bounds((nr, nc)):
-                target = board.get_piece((nr, nc))
-                if target is None or target.color != self.color:
-                    moves.append((nr, nc))
-        return moves
+    def targets(self, board, sq):
+        return _step(board.cells, KNIGHT_TARGETS[sq], self.ci)
 
 class Queen(Piece):
     symbol = 'Q'
+    kind = 5
+    value = 9
 
-    def legal_moves(self, board, pos):
+    def targets(self, board, sq):
         # combine rook + bishop moves
-        return Rook.legal_moves(self, board, pos) + Bishop.legal_moves(self, board, pos)
+        return _slide(board.cells, QUEEN_RAYS[sq], self.ci, [])
 
 class King(Piece):
     symbol = 'K'
+    kind = 6
 
-    def legal_moves(self, board, pos):
-        moves = []
-        r, c = pos
-        for dr, dc in [(1,0),(-1,0),(0,1),(0,-1),(1,1),(1,-1),(-1,1),(-1,-1)]:
-            nr, nc = r+dr, c+dc
-            if board.in_bounds((nr, nc)):
-                target = board.get_piece((nr, nc))
-                if target is None or target.color != self.color:
-                    moves.append((nr, nc))
-        return moves
+    def targets(self, board, sq):
+        return _step(board.cells, KING_TARGETS[sq], self.ci)
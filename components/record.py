@@ -0,0 +1,214 @@
+"""
+Compact binary game records and a memory-mapped archive reader.
+
+Every Game keeps a GameRecord of the moves played: 3 bytes per move
+(color index, from square, to square, as in resync) plus a snapshot of
+the position every `every` plies. An archive is a magic string followed
+by game records back to back:
+
+    header   plies, snapshot interval, flags (start snapshot, check rules),
+             inactive color bits
+    [start]  snapshot of the starting position, if not the usual opening
+    moves    plies * 3 bytes
+    snaps    (plies // every) snapshots, the position after every*k plies
+
+A sidecar .idx file holds each game's offset, so RecordReader can jump to
+any game without touching the others, and to any ply by replaying at most
+every-1 moves from the nearest snapshot.
+"""
+import mmap
+import os
+import struct
+from array import array
+
+from .player import players_colors
+from .tables import POS, square
+from .resync import MOVE_REC, SNAP_HEAD, snapshot
+
+MAGIC = b"4PCR\x01"
+SNAPSHOT_EVERY = 64
+GAME_HEAD = struct.Struct("!IHBB")   # plies, snapshot interval, flags, inactive bits
+SNAP_SIZE = SNAP_HEAD.size + 14 * 14
+HAS_START, CHECK_RULES = 1, 2   # header flags
+
+def _inactive_bits(game):
+    inactive = game.inactive_colors()
+    return sum(1 << i for i, c in enumerate(players_colors) if c in inactive)
+
+class GameRecord:
+    """Moves of one Game as they are played; Game keeps this up to date."""
+
+    def __init__(self, game, every=SNAPSHOT_EVERY, start=None):
+        self.game      = game
+        self.every     = every
+        self.start     = start      # snapshot, when not the usual opening
+        self.inactive  = None       # inactive colors as of the first move
+        self.moves     = bytearray()
+        self.snapshots = bytearray()
+
+    @property
+    def plies(self):
+        return len(self.moves) // MOVE_REC.size
+
+    def append(self, color, from_pos, to_pos):
+        """Record a move already made on game."""
+        if self.inactive is None:
+            self.inactive = _inactive_bits(self.game)
+        self.moves += MOVE_REC.pack(players_colors.index(color),
+                                    square(from_pos), square(to_pos))
+        if self.plies % self.every == 0:
+            self.snapshots += snapshot(self.game)
+
+    def pop(self):
+        """Forget the last move (after Game.undo)."""
+        if self.plies and self.plies % self.every == 0:
+            del self.snapshots[-SNAP_SIZE:]
+        del self.moves[-MOVE_REC.size:]
+
+    def to_bytes(self):
+        inactive = self.inactive if self.inactive is not None else _inactive_bits(self.game)
+        flags = (HAS_START if self.start else 0) | (CHECK_RULES if self.game.check_rules else 0)
+        head = GAME_HEAD.pack(self.plies, self.every, flags, inactive)
+        return head + (self.start or b"") + self.moves + self.snapshots
+
+def _record_size(plies, every, flags):
+    return (GAME_HEAD.size + (SNAP_SIZE if flags & HAS_START else 0)
+            + plies * MOVE_REC.size + plies // every * SNAP_SIZE)
+
+class RecordWriter:
+    """Appends game records to an archive and its offset index."""
+
+    def __init__(self, path):
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file  = open(path, 'ab')
+        self._index = open(path + '.idx', 'wb' if new else 'ab')
+        if new:
+            self._file.write(MAGIC)
+
+    def write(self, record):
+        """Append a GameRecord (or its bytes)."""
+        data = record if isinstance(record, (bytes, bytearray)) else record.to_bytes()
+        self._index.write(array('Q', [self._file.tell()]).tobytes())
+        self._file.write(data)
+
+    def close(self):
+        self._file.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class RecordView:
+    """One game inside a memory-mapped archive; nothing is parsed up front."""
+
+    def __init__(self, buf, offset):
+        self._buf = buf
+        self.plies, self.every, flags, self.inactive = GAME_HEAD.unpack_from(buf, offset)
+        offset += GAME_HEAD.size
+        self.check_rules = bool(flags & CHECK_RULES)
+        self.start = None
+        if flags & HAS_START:
+            self.start = offset
+            offset += SNAP_SIZE
+        self._moves = offset
+        self._snaps = offset + self.plies * MOVE_REC.size
+
+    def move(self, ply):
+        """(color, from, to) of the move at index ply."""
+        ci, fr, to = MOVE_REC.unpack_from(self._buf, self._moves + ply * MOVE_REC.size)
+        return players_colors[ci], POS[fr], POS[to]
+
+    def moves(self):
+        end = self._moves + self.plies * MOVE_REC.size
+        return [(players_colors[ci], POS[fr], POS[to])
+                for ci, fr, to in MOVE_REC.iter_unpack(self._buf[self._moves:end])]
+
+    def _snapshot(self, offset):
+        turn, bits = SNAP_HEAD.unpack_from(self._buf, offset)
+        cells = self._buf[offset + SNAP_HEAD.size:offset + SNAP_SIZE]
+        return cells, turn, {c for i, c in enumerate(players_colors) if bits >> i & 1}
+
+    def position(self, ply=None):
+        """A Game after the first ply moves (default: the final position)."""
+        from .game import Game
+        ply = self.plies if ply is None else ply
+        if not 0 <= ply <= self.plies:
+            raise IndexError(ply)
+        game = Game(check_rules=self.check_rules)
+        k = ply // self.every
+        if k:
+            game.restore(*self._snapshot(self._snaps + (k - 1) * SNAP_SIZE))
+        elif self.start is not None:
+            game.restore(*self._snapshot(self.start))
+        else:
+            for i, c in enumerate(players_colors):
+                if self.inactive >> i & 1:
+                    game.disable_color(c)
+        for p in range(k * self.every, ply):
+            color, fr, to = self.move(p)
+            game.apply_remote_move(fr, to, color)
+        return game
+
+class RecordReader:
+    """
+    Random access to an archive through mmap. Offsets come from the .idx
+    file; games appended after it (or all of them, without one) are found
+    by hopping from header to header.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._map  = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a game record archive")
+        self.offsets = self._load_index(path + '.idx')
+        self._scan()
+
+    def _load_index(self, path):
+        offsets = array('Q')
+        try:
+            with open(path, 'rb') as f:
+                offsets.frombytes(f.read())
+        except (OSError, ValueError):
+            return array('Q')
+        # trust it only if it lines up with the archive
+        if offsets and (offsets[0] != len(MAGIC) or offsets[-1] >= len(self._map)):
+            return array('Q')
+        return offsets
+
+    def _end_of(self, offset):
+        plies, every, flags, _ = GAME_HEAD.unpack_from(self._map, offset)
+        return offset + _record_size(plies, every, flags)
+
+    def _scan(self):
+        offset = self._end_of(self.offsets[-1]) if self.offsets else len(MAGIC)
+        size = len(self._map)
+        while offset + GAME_HEAD.size <= size:
+            end = self._end_of(offset)
+            if end > size:
+                break   # partly written
+            self.offsets.append(offset)
+            offset = end
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, i):
+        return RecordView(self._map, self.offsets[i])
+
+    def __iter__(self):
+        for offset in self.offsets:
+            yield RecordView(self._map, offset)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,74 @@
+"""
+Sequenced move log with periodic snapshots, for resuming a dropped link.
+
+Every relayed move gets the next sequence number. The log keeps the
+latest snapshot (packed board, player to move, inactive colors) and the
+moves after it, so its memory stays bounded however long the game runs.
+A peer that comes back with its last sequence number gets one payload:
+just the moves it missed, or the snapshot plus the moves after it.
+"""
+import struct
+
+from .player import players_colors
+from .tables import POS, square
+
+SNAPSHOT_EVERY = 32
+
+MOVE_REC  = struct.Struct("!BBB")   # color index, from square, to square
+SYNC_HEAD = struct.Struct("!BIH")   # has snapshot, seq before the moves, move count
+SNAP_HEAD = struct.Struct("!BB")    # turn, inactive color bits; board cells follow
+
+def snapshot(game):
+    inactive = game.inactive_colors()
+    bits = sum(1 << i for i, c in enumerate(players_colors) if c in inactive)
+    return SNAP_HEAD.pack(game.turn, bits) + game.board.to_bytes()
+
+class MoveLog:
+    def __init__(self, game, every=SNAPSHOT_EVERY):
+        self.game      = game
+        self.every     = every
+        self.seq       = 0
+        self._moves    = bytearray()   # packed moves after the snapshot
+        self._snap_seq = 0
+        self._snap     = snapshot(game)
+
+    def record(self, color, from_pos, to_pos):
+        """Log a move already applied to game; returns its sequence number."""
+        self.seq += 1
+        self._moves += MOVE_REC.pack(players_colors.index(color),
+                                     square(from_pos), square(to_pos))
+        if self.seq - self._snap_seq >= self.every:
+            self._snap     = snapshot(self.game)
+            self._snap_seq = self.seq
+            self._moves.clear()
+        return self.seq
+
+    def since(self, last_seq):
+        """
+        Payload that brings a peer at last_seq up to self.seq; with
+        last_seq None, the full current state for a peer that went astray.
+        """
+        if last_seq is not None and self._snap_seq <= last_seq <= self.seq:
+            moves = self._moves[(last_seq - self._snap_seq) * MOVE_REC.size:]
+            return SYNC_HEAD.pack(0, last_seq, len(moves) // MOVE_REC.size) + moves
+        count = len(self._moves) // MOVE_REC.size
+        return SYNC_HEAD.pack(1, self._snap_seq, count) + self._snap + self._moves
+
+def decode(data, size=14):
+    """
+    Unpack a since() payload into (snapshot, moves, seq): snapshot is
+    (cells, turn, inactive colors) or None, moves are (color, from, to).
+    """
+    has_snap, seq, count = SYNC_HEAD.unpack_from(data)
+    offset = SYNC_HEAD.size
+    snap = None
+    if has_snap:
+        turn, bits = SNAP_HEAD.unpack_from(data, offset)
+        offset += SNAP_HEAD.size
+        cells = data[offset:offset + size * size]
+        offset += size * size
+        snap = (cells, turn, {c for i, c in enumerate(players_colors) if bits >> i & 1})
+    moves = []
+    for ci, fr, to in MOVE_REC.iter_unpack(data[offset:offset + count * MOVE_REC.size]):
+        moves.append((players_colors[ci], POS[fr], POS[to]))
+    return snap, moves, seq + count
@@ -0,0 +1,146 @@
+"""
+Headless bot-vs-bot games on a process pool.
+
+Nothing here imports pygame; games are played on Game directly and each
+finished game becomes one JSON line in the output file.
+"""
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .engine import Engine
+from .game import Game
+from .record import RecordWriter
+from .pieces import COLOR_INDEX
+from .board import _VALUES
+from .player import players_colors
+from .tables import POS
+
+class RandomBot:
+    def __init__(self, color, rng):
+        self.color = color
+        self.rng = rng
+
+    def choose(self, game):
+        moves = game.legal_moves(self.color)
+        return self.rng.choice(moves) if moves else None
+
+class GreedyBot(RandomBot):
+    """Takes the most valuable capture on offer, else moves at random."""
+
+    def choose(self, game):
+        moves = game.legal_moves(self.color)
+        if not moves:
+            return None
+        cells = game.board.cells
+        best = max(_VALUES[cells[to]] for _, to in moves)
+        return self.rng.choice([m for m in moves if _VALUES[cells[m[1]]] == best])
+
+class EngineBot:
+    def __init__(self, color, time_budget=0.1, max_depth=None):
+        kwargs = {'tt_bits': 16}
+        if max_depth:
+            # fixed depth: reproducible regardless of machine load
+            kwargs['max_depth'] = max_depth
+            time_budget = 1e9
+        self.engine = Engine(color, time_budget, **kwargs)
+
+    def choose(self, game):
+        return self.engine.search(game.board, game.inactive_colors())
+
+def make_bot(spec, color, rng):
+    """
+    Build a bot from a spec string: 'random', 'greedy',
+    'engine[:seconds]' or 'depth:plies'.
+    """
+    name, _, arg = spec.partition(':')
+    if name == 'random':
+        return RandomBot(color, rng)
+    if name == 'greedy':
+        return GreedyBot(color, rng)
+    if name == 'engine':
+        return EngineBot(color, float(arg) if arg else 0.1)
+    if name == 'depth':
+        return EngineBot(color, max_depth=int(arg or 2))
+    raise ValueError(f"unknown bot spec {spec!r}")
+
+def play_game(specs, seed=0, max_plies=400, record=False, check_rules=False):
+    """
+    Play one game with specs[i] controlling players_colors[i].
+    Returns the result record for the output file; with record, also
+    the packed GameRecord.
+    """
+    rng = random.Random(seed)
+    game = Game(check_rules=check_rules)
+    bots = {c: make_bot(spec, c, rng) for c, spec in zip(players_colors, specs)}
+    eliminated = []
+    think = {c: 0.0 for c in players_colors}
+    moves = {c: 0 for c in players_colors}
+    plies = 0
+    while plies < max_plies:
+        alive = [c for c in players_colors if game.is_alive(c)]
+        if len(alive) < 2:
+            break
+        color = game.current_player().color
+        start = time.perf_counter()
+        move = bots[color].choose(game)
+        think[color] += time.perf_counter() - start
+        moves[color] += 1
+        plies += 1
+        if move is None:
+            # no moves: pass the turn
+            game.advance_turn()
+            continue
+        game.apply_remote_move(POS[move[0]], POS[move[1]], color)
+        eliminated += [c for c in alive if not game.is_alive(c)]
+    alive = [c for c in players_colors if game.is_alive(c)]
+    result = {
+        'seed': seed,
+        'bots': list(specs),
+        'winner': alive[0] if len(alive) == 1 else None,
+        'plies': plies,
+        'eliminated': eliminated,
+        'ms_per_move': {c: round(1000 * think[c] / moves[c], 3)
+                        for c in players_colors if moves[c]},
+    }
+    if record:
+        return result, game.record.to_bytes()
+    return result
+
+def _play(args):
+    return play_game(*args)
+
+def run(games=100, bots=('random',), workers=None, out='selfplay.jsonl',
+        max_plies=400, seed=0, record=None, check_rules=False):
+    """
+    Play games between bots across a process pool and append one JSON line
+    per game to out (and, given a record path, the moves to that binary
+    archive). Returns {winner color or None: count}.
+    """
+    if isinstance(bots, str):
+        bots = bots.split(',')
+    specs = [bots[i % len(bots)] for i in range(len(players_colors))]
+    workers = workers or os.cpu_count()
+    jobs = [(specs, seed + i, max_plies, bool(record), check_rules) for i in range(games)]
+    tally = {}
+    start = time.perf_counter()
+    archive = RecordWriter(record) if record else None
+    with ProcessPoolExecutor(workers) as pool, open(out, 'a') as f:
+        # chunked so per-task IPC stays negligible next to a game
+        chunk = max(1, games // (workers * 8))
+        for result in pool.map(_play, jobs, chunksize=chunk):
+            if archive:
+                result, data = result
+                archive.write(data)
+            f.write(json.dumps(result, separators=(',', ':')) + '\n')
+            tally[result['winner']] = tally.get(result['winner'], 0) + 1
+    if archive:
+        archive.close()
+    elapsed = time.perf_counter() - start
+    print(f"{games} games in {elapsed:.1f}s ({games / elapsed:.2f} games/sec, {workers} workers)")
+    for color in players_colors + [None]:
+        label = f"{color} ({specs[COLOR_INDEX[color]]})" if color else 'draws'
+        print(f"  {label}: {tally.get(color, 0)}")
+    return tally
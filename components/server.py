@@ -0,0 +1,412 @@
+"""
+Headless multi-room game server (no pygame).
+
+One selector thread serves every connection on one port. Before a game a
+client talks to the lobby with JSON frames:
+
+    {"type":"create"}             -> {"type":"room","room":id,"players":n}
+    {"type":"join","room":id}     -> {"type":"room",...} or {"type":"error",...}
+    {"type":"list"}               -> {"type":"rooms","rooms":{id: players}}
+    {"type":"start"}              room creator starts once min_players joined
+    {"type":"ping","t":t}         -> {"type":"pong","t":t}, any time
+
+A room also starts by itself when it fills up. Its members then go through
+the same assign / pubkey / init handshake as HostNetwork.start_game. The
+server holds no color: it signs the session keys with its own key and
+sends that key as "host_pem" in init. A move is relayed within the room
+only if the room's own Game accepts it as legal and in turn; a refused
+sender gets the current position back. The room's MoveLog lets a dropped
+player resume with {"type":"resume","room":id,...} as with HostNetwork.
+Rooms are dropped when their game ends, when they sit in the lobby for
+longer than lobby_timeout, when a member never sends its key within
+HANDSHAKE_TIMEOUT of the start, or when nobody has been connected for
+lobby_timeout. A room's Game keeps no undo history or repetition counts
+and a GameRecord only with an archive, so with the MoveLog's bounded
+window a long game costs no more memory than a short one.
+Finished games are appended to the archive file, if one is given.
+"""
+import hmac
+import itertools
+import json
+import random
+import selectors
+import socket
+import time
+
+from cryptography.hazmat.primitives import serialization
+
+from .game import Game
+from .player import players_colors
+from .net import (Connection, _KeyHolder, new_session, pem,
+                  JSON_FRAME, MOVE_FRAME, SYNC_FRAME)
+from .resync import MoveLog
+from .record import RecordWriter
+from . import keys, metrics
+
+# per-connection receive buffer; frames here are tiny and the buffer grows
+# if a bigger one ever arrives
+BUFSIZE = 4096
+HANDSHAKE_TIMEOUT = 30   # seconds for every member of a started room to send its key
+
+class Room:
+    __slots__ = ('id', 'owner', 'members', 'assignments', 'pubkeys',
+                 'sessions', 'game', 'log', 'started', 'created', 'started_at',
+                 'empty_since')
+
+    def __init__(self, room_id, owner):
+        self.id          = room_id
+        self.owner       = owner
+        self.members     = [owner]   # addrs, in join order
+        self.assignments = {}        # addr->color
+        self.pubkeys     = {}        # color->public key
+        self.sessions    = {}        # addr->Session
+        self.game        = None      # created when the room starts
+        self.log         = None
+        self.started     = False
+        self.created     = time.monotonic()
+        self.started_at  = None
+        self.empty_since = None      # everyone dropped mid-game
+
+class GameServer(_KeyHolder):
+    def __init__(self, port=5000, max_rooms=1000, min_players=2, max_players=4,
+                 lobby_timeout=600, key_pool=None, archive=None, check_rules=False):
+        self.port          = port
+        self.check_rules   = check_rules
+        self.max_rooms     = max_rooms
+        self.min_players   = min_players
+        self.max_players   = max_players
+        self.lobby_timeout = lobby_timeout
+        self.conns         = {}     # addr->Connection
+        self.rooms         = {}     # room id->Room
+        self.room_of       = {}     # addr->Room
+        self._ids          = itertools.count(1)
+        self.archive       = RecordWriter(archive) if archive else None
+        self._key          = (key_pool or keys.default_pool).get()
+        self._shutdown     = False
+        self._selector     = selectors.DefaultSelector()
+        self._dirty        = set()  # addrs with queued output
+
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(('0.0.0.0', self.port))
+        self.server.listen(128)
+        self.server.setblocking(False)
+
+    # --- lobby ---
+
+    def _queue(self, addr, kind, body):
+        self.conns[addr].queue(kind, body)
+        self._dirty.add(addr)
+
+    def _send(self, addr, msg):
+        self._queue(addr, JSON_FRAME, json.dumps(msg).encode())
+
+    def _announce(self, room):
+        msg = {"type":"room", "room":room.id, "players":len(room.members)}
+        for addr in room.members:
+            self._send(addr, {**msg, "owner": addr == room.owner})
+
+    def _lobby(self, addr, msg):
+        kind = msg.get("type")
+        room = self.room_of.get(addr)
+        if kind == "list":
+            self._send(addr, {"type":"rooms", "rooms":{
+                r.id: len(r.members) for r in self.rooms.values() if not r.started}})
+        elif kind == "create" and room is None:
+            if len(self.rooms) >= self.max_rooms:
+                self._send(addr, {"type":"error", "error":"server full"})
+                return
+            room = Room(str(next(self._ids)), addr)
+            self.rooms[room.id] = room
+            self.room_of[addr] = room
+            self._announce(room)
+        elif kind == "join" and room is None:
+            room = self.rooms.get(str(msg.get("room")))
+            if room is None or room.started or len(room.members) >= self.max_players:
+                self._send(addr, {"type":"error", "error":"no such open room"})
+                return
+            room.members.append(addr)
+            self.room_of[addr] = room
+            self._announce(room)
+            if len(room.members) == self.max_players:
+                self._start(room)
+        elif kind == "start" and room is not None and addr == room.owner:
+            if not room.started and len(room.members) >= self.min_players:
+                self._start(room)
+        elif kind == "pubkey" and room is not None and room.started:
+            self._pubkey(room, addr, msg)
+        elif kind == "resume" and room is None:
+            self._resume(addr, msg)
+        elif kind == "ping":
+            self._send(addr, {"type":"pong", "t":msg.get("t")})
+
+    # --- handshake, as in HostNetwork.start_game ---
+
+    def _start(self, room):
+        room.started = True
+        room.started_at = time.monotonic()
+        pool = players_colors.copy()
+        random.shuffle(pool)
+        for addr in room.members:
+            room.assignments[addr] = pool.pop()
+            self._send(addr, {"type":"assign", "color":room.assignments[addr]})
+        # no undo or repetition tracking: memory per room stays flat; the
+        # record is only kept when it will be archived
+        room.game = Game(check_rules=self.check_rules, history=False,
+                         record=self.archive is not None)
+        for c in pool:
+            room.game.disable_color(c)
+        room.log = MoveLog(room.game)
+
+    def _pubkey(self, room, addr, msg):
+        color = room.assignments.get(addr)
+        if color is None or color in room.pubkeys:
+            return
+        room.pubkeys[color] = serialization.load_pem_public_key(msg["pem"].encode())
+        if len(room.pubkeys) == len(room.members):
+            self._begin(room)
+
+    def _begin(self, room):
+        """Every member has sent its key: hand out sessions."""
+        init = {
+            "type":        "init",
+            "host_color":  None,
+            "host_pem":    pem(self.public_key),
+            "check_rules": self.check_rules,
+            "assignments": {str(k):v for k,v in room.assignments.items()},
+            "pubkeys":     {c: pem(pub) for c, pub in room.pubkeys.items()}
+        }
+        for member in room.members:
+            room.sessions[member], sealed = new_session(
+                room.pubkeys[room.assignments[member]], self.private_key)
+            self._send(member, {**init, **sealed})
+        print(f"[SERVER] Room {room.id} started with {len(room.members)} players")
+
+    def _resume(self, addr, msg):
+        """A dropped player back on a new connection; see HostNetwork._resume."""
+        room = self.rooms.get(str(msg.get("room")))
+        color, last_seq, mac = msg.get("color"), msg.get("last_seq"), msg.get("mac")
+        valid = (isinstance(color, str) and isinstance(mac, str)
+                 and type(last_seq) is int and 0 <= last_seq < 1 << 32)
+        old = valid and room and next((a for a, c in room.assignments.items()
+                                       if c == color and a in room.sessions), None)
+        try:
+            mac = bytes.fromhex(mac) if old else b""
+        except ValueError:
+            old = None
+        if not old or not hmac.compare_digest(
+                mac, room.sessions[old].resume_mac(color, last_seq)):
+            self._send(addr, {"type":"error", "error":"cannot resume"})
+            return
+        if old in self.conns:
+            self._evict(old)
+        session, sealed = new_session(room.pubkeys[color], self.private_key)
+        del room.sessions[old]
+        del room.assignments[old]
+        room.sessions[addr]    = session
+        room.assignments[addr] = color
+        room.members.append(addr)
+        room.empty_since       = None
+        self.room_of[addr]     = room
+        self._send(addr, {"type":"resync", **sealed})
+        self._queue(addr, SYNC_FRAME, session.seal_sync(room.log.since(last_seq)))
+
+    # --- play ---
+
+    def _move(self, addr, body):
+        room = self.room_of.get(addr)
+        session = room and room.sessions.get(addr)
+        if session is None:
+            return
+        move = session.open_move(body)
+        if move is None or move[0] != room.assignments[addr]:
+            print(f"[SERVER] Dropped unauthenticated move from {addr}")
+            return
+        color, fr, to, fp, _ = move
+        if not room.game.is_legal(color, fr, to):
+            print(f"[SERVER] Rejected {color} move {fr}->{to} in room {room.id}")
+            metrics.count('server.rejected')
+            self._queue(addr, SYNC_FRAME, session.seal_sync(room.log.since(None)))
+            return
+        room.game.apply_remote_move(fr, to, color, fp)
+        seq = room.log.record(color, fr, to)
+        metrics.count('server.moves')
+        for member in room.members:
+            if member != addr:
+                self._queue(
+                    member, MOVE_FRAME, room.sessions[member].seal_move(color, fr, to, fp, seq))
+        alive = [c for c in players_colors if room.game.is_alive(c)]
+        if len(alive) < 2:
+            self._finish(room, alive[0] if alive else None)
+
+    def _finish(self, room, winner):
+        if self.archive:
+            self.archive.write(room.game.record)
+        for addr in room.members:
+            self._send(addr, {"type":"over", "winner":winner})
+        self._close_room(room)
+
+    def _close_room(self, room):
+        """Forget the room; members are disconnected once their queues drain."""
+        self.rooms.pop(room.id, None)
+        room.members = [a for a in room.members if a in self.conns]
+        for addr in room.members:
+            self.room_of[addr] = None
+            self._dirty.add(addr)   # dropped once their queue drains
+
+    # --- connections ---
+
+    def _accept(self):
+        try:
+            sock, addr = self.server.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        sock.setblocking(False)
+        self.conns[addr] = Connection(sock, BUFSIZE)
+        self._selector.register(sock, selectors.EVENT_READ, addr)
+
+    def _evict(self, addr):
+        conn = self.conns.pop(addr, None)
+        if conn is None:
+            return
+        self._selector.unregister(conn.sock)
+        conn.close()
+        self._dirty.discard(addr)
+        room = self.room_of.pop(addr, None)
+        if room is None:
+            return
+        room.members.remove(addr)
+        if room.started and not room.sessions:
+            self._leave_handshake(room, addr)
+        elif room.started:
+            # keep the game for a while in case they resume
+            if not room.members:
+                room.empty_since = time.monotonic()
+        elif not room.members:
+            self.rooms.pop(room.id, None)
+        else:
+            if room.owner == addr:
+                room.owner = room.members[0]
+            self._announce(room)
+
+    def _leave_handshake(self, room, addr):
+        """
+        A member left before init: without a session they could never
+        resume, so their color sits out and the rest go on without them.
+        """
+        color = room.assignments.pop(addr)
+        room.pubkeys.pop(color, None)
+        room.game.disable_color(color)
+        if len(room.members) < self.min_players:
+            for member in room.members:
+                self._send(member, {"type":"error", "error":"not enough players"})
+            self._close_room(room)
+        elif len(room.pubkeys) == len(room.members):
+            self._begin(room)
+
+    def _handle(self, addr, kind, body):
+        if kind == JSON_FRAME:
+            msg = json.loads(body)
+            if not isinstance(msg, dict):
+                raise ValueError("lobby message is not an object")
+            self._lobby(addr, msg)
+        elif kind == MOVE_FRAME:
+            with metrics.timed('server.move'):
+                self._move(addr, body)
+
+    def _sweep(self):
+        now = time.monotonic()
+        for room in list(self.rooms.values()):
+            if not room.started and now - room.created > self.lobby_timeout:
+                for addr in room.members:
+                    self._send(addr, {"type":"error", "error":"lobby timed out"})
+                self._close_room(room)
+            elif not room.sessions and room.started and now - room.started_at > HANDSHAKE_TIMEOUT:
+                for addr in room.members:
+                    self._send(addr, {"type":"error", "error":"handshake timed out"})
+                self._close_room(room)
+            elif room.empty_since and now - room.empty_since > self.lobby_timeout:
+                self._close_room(room)
+
+    def serve_forever(self):
+        sel = self._selector
+        sel.register(self.server, selectors.EVENT_READ)
+        print(f"[SERVER] Listening on port {self.port}")
+        last_sweep = time.monotonic()
+        while not self._shutdown:
+            for key, events in sel.select(timeout=1.0):
+                if key.fileobj is self.server:
+                    self._accept()
+                    continue
+                addr = key.data
+                conn = self.conns.get(addr)
+                if conn is None:
+                    continue
+                if not events & selectors.EVENT_READ:
+                    continue    # writable: _flush_dirty below
+                try:
+                    for kind, body in conn.read_frames():
+                        self._handle(addr, kind, body)
+                except (ConnectionError, OSError, ValueError, KeyError,
+                        TypeError, AttributeError):
+                    # a bad frame costs only its sender the connection
+                    self._evict(addr)
+            if time.monotonic() - last_sweep > 1.0:
+                self._sweep()
+                last_sweep = time.monotonic()
+            self._flush_dirty()
+
+    def _flush_dirty(self):
+        """Write queued output; only wait for writability while some is left."""
+        sel = self._selector
+        done = set()
+        pending = list(self._dirty)
+        while pending:
+            for addr in pending:
+                self._flush(sel, addr)
+            done.update(pending)
+            # evictions above can queue messages for others
+            pending = list(self._dirty - done)
+
+    def _flush(self, sel, addr):
+        conn = self.conns.get(addr)
+        if conn is None:
+            self._dirty.discard(addr)
+            return
+        try:
+            drained = conn.flush()
+        except (ConnectionError, OSError):
+            self._evict(addr)
+            return
+        if drained and self.room_of.get(addr, True) is None:
+            # their room is gone and the last message went out
+            self._evict(addr)
+            return
+        if drained:
+            self._dirty.discard(addr)
+        events = selectors.EVENT_READ | (0 if drained else selectors.EVENT_WRITE)
+        if sel.get_key(conn.sock).events != events:
+            sel.modify(conn.sock, events, addr)
+
+    def shutdown(self):
+        self._shutdown = True
+        self.server.close()
+        for conn in self.conns.values():
+            conn.close()
+        if self.archive:
+            self.archive.close()
+
+def serve(port=5000, max_rooms=1000, lobby_timeout=600, archive=None, check_rules=False,
+          metrics_file=None, metrics_every=10.0):
+    server = GameServer(port, max_rooms, lobby_timeout=lobby_timeout, archive=archive,
+                        check_rules=check_rules)
+    stop_dump = metrics.dump_every(metrics_file, metrics_every) if metrics_file else None
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        if stop_dump:
+            stop_dump.set()
+            metrics.dump(metrics_file)
@@ -0,0 +1,68 @@
+"""
+Piece sprites from a single atlas image, with per-cell-size caches.
+
+The atlas packs every piece into one PNG (one row per color in
+players_colors order, one column per piece type). It is built from the
+individual assets/ PNGs the first time and saved next to them, so later
+start-ups decode a single small file. Scaled sprite sets are cached by
+cell size and shared by every GUI in the process.
+"""
+import os
+import pygame
+
+from .player import players_colors
+from .pieces import Pawn, Rook, Knight, Bishop, Queen, King
+
+ASSETS = "assets"
+TILE = 128  # atlas tile size; sprites are scaled down from this
+SYMBOLS = [cls.symbol for cls in [Pawn, Rook, Knight, Bishop, Queen, King]]
+ATLAS_PATH = os.path.join(ASSETS, f"atlas_{TILE}.png")
+DIM_ALPHA = 100
+
+_atlas = None
+_sprite_sets = {}   # (cell, dimmed) -> {(color, symbol): Surface}
+
+def _build_atlas():
+    atlas = pygame.Surface((TILE * len(SYMBOLS), TILE * len(players_colors)), pygame.SRCALPHA)
+    for row, color in enumerate(players_colors):
+        for col, symbol in enumerate(SYMBOLS):
+            img = pygame.image.load(os.path.join(ASSETS, f"{color}{symbol}.png"))
+            atlas.blit(pygame.transform.smoothscale(img.convert_alpha(), (TILE, TILE)),
+                       (col * TILE, row * TILE))
+    try:
+        pygame.image.save(atlas, ATLAS_PATH)
+    except pygame.error:
+        pass    # read-only install: rebuild next time
+    return atlas
+
+def atlas():
+    """The atlas surface, decoded once per process."""
+    global _atlas
+    if _atlas is None:
+        if os.path.exists(ATLAS_PATH):
+            _atlas = pygame.image.load(ATLAS_PATH).convert_alpha()
+        else:
+            _atlas = _build_atlas()
+    return _atlas
+
+def sprite_set(cell, dimmed=False):
+    """{(color, symbol): Surface} scaled to cell pixels; cached per size."""
+    key = (cell, dimmed)
+    sprites = _sprite_sets.get(key)
+    if sprites is None:
+        if dimmed:
+            sprites = {}
+            for k, img in sprite_set(cell).items():
+                img = img.copy()
+                img.set_alpha(DIM_ALPHA)
+                sprites[k] = img
+        else:
+            sheet = atlas()
+            sprites = {
+                (color, symbol): pygame.transform.smoothscale(
+                    sheet.subsurface((col * TILE, row * TILE, TILE, TILE)), (cell, cell))
+                for row, color in enumerate(players_colors)
+                for col, symbol in enumerate(SYMBOLS)
+            }
+        _sprite_sets[key] = sprites
+    return sprites
@@ -0,0 +1,97 @@
+"""
+Move tables for the 14x14 four-player board, built once at import time.
+
+Squares are indexed row-major (sq = r * SIZE + c). Every table already
+excludes squares off the board and inside the four 3x3 forbidden corners,
+so move generation is a plain walk over precomputed square lists.
+"""
+
+SIZE = 14
+NUM_SQUARES = SIZE * SIZE
+CORNER = 3
+
+def is_forbidden(pos):
+    r, c = pos
+    lo, hi = CORNER, SIZE - CORNER
+    return (r < lo or r >= hi) and (c < lo or c >= hi)
+
+# (r, c) tuple for every square index, shared so callers never allocate one
+POS = tuple((sq // SIZE, sq % SIZE) for sq in range(NUM_SQUARES))
+PLAYABLE = tuple(not is_forbidden(p) for p in POS)
+
+def square(pos):
+    return pos[0] * SIZE + pos[1]
+
+def _target(sq, dr, dc):
+    """Square reached by one (dr, dc) step from sq, or None."""
+    r, c = POS[sq]
+    nr, nc = r + dr, c + dc
+    if 0 <= nr < SIZE and 0 <= nc < SIZE and PLAYABLE[nr * SIZE + nc]:
+        return nr * SIZE + nc
+    return None
+
+def _ray(sq, dr, dc):
+    ray = []
+    t = _target(sq, dr, dc)
+    while t is not None:
+        ray.append(t)
+        t = _target(t, dr, dc)
+    return tuple(ray)
+
+ROOK_DIRS   = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+BISHOP_DIRS = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+KNIGHT_DIRS = [(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)]
+KING_DIRS   = ROOK_DIRS + BISHOP_DIRS
+
+# Direction vectors for pawn movement by color
+PAWN_DIRS = {
+    'w': (-1, 0),  # up
+    'b': ( 1, 0),  # down
+    'r': ( 0, -1),  # left
+    'g': ( 0, 1),  # right
+}
+
+def _steps(dirs):
+    table = []
+    for sq in range(NUM_SQUARES):
+        if not PLAYABLE[sq]:
+            table.append(())
+            continue
+        targets = (_target(sq, dr, dc) for dr, dc in dirs)
+        table.append(tuple(t for t in targets if t is not None))
+    return tuple(table)
+
+def _rays(dirs):
+    table = []
+    for sq in range(NUM_SQUARES):
+        if not PLAYABLE[sq]:
+            table.append(())
+            continue
+        rays = (_ray(sq, dr, dc) for dr, dc in dirs)
+        table.append(tuple(ray for ray in rays if ray))
+    return tuple(table)
+
+KNIGHT_TARGETS = _steps(KNIGHT_DIRS)
+KING_TARGETS   = _steps(KING_DIRS)
+ROOK_RAYS      = _rays(ROOK_DIRS)
+BISHOP_RAYS    = _rays(BISHOP_DIRS)
+QUEEN_RAYS     = tuple(ROOK_RAYS[sq] + BISHOP_RAYS[sq] for sq in range(NUM_SQUARES))
+
+def _pawn_tables(color):
+    dr, dc = PAWN_DIRS[color]
+    pushes, captures = [], []
+    for sq in range(NUM_SQUARES):
+        if not PLAYABLE[sq]:
+            pushes.append(None)
+            captures.append(())
+            continue
+        pushes.append(_target(sq, dr, dc))
+        # diagonals either side of the forward step
+        caps = (_target(sq, dr - dc, dc + dr), _target(sq, dr + dc, dc - dr))
+        captures.append(tuple(t for t in caps if t is not None))
+    return tuple(pushes), tuple(captures)
+
+PAWN_PUSHES = {}
+PAWN_CAPTURES = {}
+for _color in PAWN_DIRS:
+    PAWN_PUSHES[_color], PAWN_CAPTURES[_color] = _pawn_tables(_color)
@@ -0,0 +1,73 @@
+"""
+Zobrist position keys and a fixed-size transposition table.
+
+Keys come from a fixed seed so every peer computes the same fingerprint
+for the same position.
+"""
+import random
+
+from .player import players_colors
+from .tables import NUM_SQUARES
+
+_rng = random.Random(0x4C4E5353)
+
+# PIECE_KEYS[code][sq]; code 0 (empty) hashes to 0 so updates need no branch
+PIECE_KEYS = [[0] * NUM_SQUARES] + [
+    [_rng.getrandbits(64) for _ in range(NUM_SQUARES)] for _ in range(1, 32)
+]
+SIDE_KEYS = {color: _rng.getrandbits(64) for color in players_colors}
+
+def board_key(cells):
+    """Full (non-incremental) key of a packed cell buffer."""
+    key = 0
+    for sq, code in enumerate(cells):
+        key ^= PIECE_KEYS[code][sq]
+    return key
+
+# transposition table entry bounds
+EXACT, LOWER, UPPER = 0, 1, 2
+
+class TranspositionTable:
+    """
+    Array-backed table of 2**bits slots indexed by the low key bits.
+    A slot is replaced when it holds the same key, is from an older
+    search, or was searched no deeper than the new entry.
+    """
+    def __init__(self, bits=18):
+        self.size = 1 << bits
+        self.mask = self.size - 1
+        self.age = 0
+        self.keys = [None] * self.size
+        self.depths = [0] * self.size
+        self.values = [0] * self.size
+        self.flags = [EXACT] * self.size
+        self.moves = [None] * self.size
+        self.ages = [0] * self.size
+
+    def new_search(self):
+        """Age existing entries so they become preferred for replacement."""
+        self.age += 1
+
+    def clear(self):
+        self.keys = [None] * self.size
+        self.age = 0
+
+    def probe(self, key):
+        """Return (depth, value, flag, move) stored for key, or None."""
+        i = key & self.mask
+        if self.keys[i] != key:
+            return None
+        return self.depths[i], self.values[i], self.flags[i], self.moves[i]
+
+    def store(self, key, depth, value, flag, move=None):
+        i = key & self.mask
+        stored = self.keys[i]
+        if (stored is not None and stored != key and self.ages[i] == self.age
+                and self.depths[i] > depth):
+            return
+        self.keys[i] = key
+        self.depths[i] = depth
+        self.values[i] = value
+        self.flags[i] = flag
+        self.moves[i] = move
+        self.ages[i] = self.age
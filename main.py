@@ -2,24 +2,36 @@ import pygame, sys, socket, threading, time
 from components.game   import Game
 from components.gui    import GUI
 from components.net    import HostNetwork, ClientNetwork
+from components.engine import EnginePlayer
+from components        import keys, metrics
 from components.player import players_colors
 
 SCREEN_W, SCREEN_H = 500, 300
 BUTTON_W, BUTTON_H = 200, 50
+HUMAN_COLOR = 'w'       # your color when playing against the computer
+ENGINE_TIME = 1.0       # seconds per computer move
+ENGINE_WORKERS = 1      # search processes per computer move
+CHECK_RULES = False     # no moving into check; no legal move means elimination
+METRICS_FILE = None     # e.g. 'metrics.jsonl': append timings every 10 s (F3 shows them)
 
 def show_menu():
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_W, SCREEN_H))
     pygame.display.set_caption("4-Player Chess")
     font = pygame.font.SysFont(None,36)
-    single = pygame.Rect(100,60,BUTTON_W,BUTTON_H)
-    multi  = pygame.Rect(100,150,BUTTON_W,BUTTON_H)
+    clock = pygame.time.Clock()
+    single = pygame.Rect(100,40,BUTTON_W,BUTTON_H)
+    bots   = pygame.Rect(100,120,BUTTON_W,BUTTON_H)
+    multi  = pygame.Rect(100,200,BUTTON_W,BUTTON_H)
     while True:
         screen.fill((50,50,50))
         pygame.draw.rect(screen,(100,100,200),single)
+        pygame.draw.rect(screen,(100,160,160),bots)
         pygame.draw.rect(screen,(200,100,100),multi)
         screen.blit(font.render("Single-Player",True,(255,255,255)),
                     (single.x+20,single.y+10))
+        screen.blit(font.render("vs Computer",True,(255,255,255)),
+                    (bots.x+20,bots.y+10))
         screen.blit(font.render("Multi-Player",True,(255,255,255)),
                     (multi.x+20,multi.y+10))
         for e in pygame.event.get():
@@ -27,12 +39,15 @@ def show_menu():
                 pygame.quit(); sys.exit()
             if e.type==pygame.MOUSEBUTTONDOWN:
                 if single.collidepoint(e.pos): return 'single'
+                if bots.collidepoint(e.pos):   return 'bots'
                 if multi.collidepoint(e.pos):  return 'multi'
         pygame.display.flip()
+        clock.tick(30)
 
 def show_mp_menu():
     screen=pygame.display.get_surface()
     font=pygame.font.SysFont(None,32)
+    clock=pygame.time.Clock()
     host_b=pygame.Rect(100,60,BUTTON_W,BUTTON_H)
     join_b=pygame.Rect(100,150,BUTTON_W,BUTTON_H)
     while True:
@@ -50,6 +65,7 @@ def show_mp_menu():
                 if host_b.collidepoint(e.pos): return 'host'
                 if join_b.collidepoint(e.pos): return 'join'
         pygame.display.flip()
+        clock.tick(30)
 
 def input_text_screen(prompt,width=300,height=50):
     screen=pygame.display.get_surface()
@@ -104,20 +120,32 @@ def get_local_ip():
         s.close()
 
 def main():
+    # have handshake keys ready before anyone clicks Host or Join
+    keys.default_pool.prefetch()
+    if METRICS_FILE:
+        metrics.dump_every(METRICS_FILE)
     mode=show_menu()
     pygame.display.quit()
     if mode=='single':
-        g=Game(); GUI(g).run(); return
+        g=Game(check_rules=CHECK_RULES); GUI(g).run(); return
+    if mode=='bots':
+        g=Game(check_rules=CHECK_RULES)
+        bots=EnginePlayer(g,[c for c in players_colors if c!=HUMAN_COLOR],
+                          time_budget=ENGINE_TIME,workers=ENGINE_WORKERS)
+        bots.on_move=g.post_engine_move
+        GUI(g,local_color=HUMAN_COLOR).run()
+        bots.stop(); return
 
     pygame.init()
     pygame.display.set_mode((SCREEN_W,SCREEN_H))
     choice=show_mp_menu()
 
     if choice=='host':
-        host_net=HostNetwork()
+        host_net=HostNetwork(check_rules=CHECK_RULES)
         screen=pygame.display.get_surface()
         font=pygame.font.SysFont(None,28)
         local_ip=get_local_ip()
+        clock=pygame.time.Clock()
         started=False
         while not started:
             screen.fill((30,30,30))
@@ -137,6 +165,7 @@ def main():
                                          daemon=True).start()
                         started=True
                         break
+            clock.tick(30)
         while len(host_net.peer_pubkeys)<len(host_net.assignments):
             screen.fill((30,30,30))
             screen.blit(font.render("Initializing...",True,(255,255,255)),
@@ -148,8 +177,10 @@ def main():
             pygame.display.flip()
             pygame.time.delay(100)
 
-        game=Game()
-        host_net.on_move=game.apply_remote_move
+        game=Game(check_rules=CHECK_RULES)
+        host_net.on_move=game.post_remote_move
+        host_net.on_restore=game.post_restore
+        host_net.fingerprint=game.position_key
         assigned=set(host_net.assignments.values())
         for c in players_colors:
             if c not in assigned:
@@ -159,22 +190,40 @@ def main():
 
     else:
         while True:
-            ip=input_text_screen("Enter host IP:",width=280)
+            # "ip" joins a hosted game; "ip/new" or "ip/<room>" a game server
+            ip,_,room=input_text_screen("Enter host IP[/room]:",width=280).partition('/')
             try:
-                cli_net=ClientNetwork(ip)
+                cli_net=ClientNetwork(ip,room=room or None)
                 break
             except ConnectionRefusedError:
                 show_message_screen("Connection refused. Any key to retry.")
         while not cli_net.ready:
+            if cli_net.error:
+                show_message_screen(cli_net.error)
+                pygame.quit(); sys.exit()
             screen=pygame.display.get_surface()
             font=pygame.font.SysFont(None,28)
             screen.fill((30,30,30))
             screen.blit(font.render("Joining...",True,(255,255,255)),
                         (20,SCREEN_H//2-10))
+            if cli_net.room_players:
+                hint=". Press S to start" if cli_net.room_owner else ""
+                screen.blit(font.render(
+                    f"Room {cli_net.room}: {cli_net.room_players}/4 players{hint}",
+                    True,(200,200,200)
+                ),(20,SCREEN_H//2+20))
             pygame.display.flip()
+            for e in pygame.event.get():
+                if e.type==pygame.QUIT:
+                    pygame.quit(); sys.exit()
+                if (e.type==pygame.KEYDOWN and e.key==pygame.K_s
+                        and cli_net.room_owner):
+                    cli_net.start_room()
             pygame.time.delay(100)
-        game=Game()
-        cli_net.on_move=game.apply_remote_move
+        game=Game(check_rules=cli_net.check_rules)
+        cli_net.on_move=game.post_remote_move
+        cli_net.on_restore=game.post_restore
+        cli_net.fingerprint=game.position_key
         assigned=set(cli_net.assignments.values())
         for c in players_colors:
             if c not in assigned: